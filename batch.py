@@ -0,0 +1,177 @@
+
+# ------------------------------------------------------ #
+# Headless Entry Point
+# ------------------------------------------------------ #
+# run operations without the graphical interface, for instance:
+#   python batch.py run_join -a a.csv -b b.txt -o result.txt --option "{\"optJoinColumns\": [1, 0, 2, 0]}"
+# note: this module (and every module imported here) must not depend on tkinter
+
+import setting
+import mod_data as data
+import mod_function as func
+import mod_instrument as inst
+import mod_validate as vald
+import mod_writer as wrt
+import operation as operation
+
+import argparse
+import json
+import sys
+
+# operations available in batch mode (profiling is an interactive form, therefore excluded)
+commands = ['run_join', 'run_aggregation', 'run_compare_value', 'run_exception', 'run_connection']
+
+
+class Console:
+    """
+    stand-in for the visual objects linked to DataSource (main window, Message Window, Memory Consumption Reader),
+    messages are printed to stderr so that stdout is reserved for the result
+    """
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+
+    def add(self, text, tag=''):
+        if not self.quiet:
+            print(('(!) ' if tag == 'important' else '') + text, file=sys.stderr)
+
+    def waiting_message(self, action):
+        pass
+
+    def refresh(self, name=None, df=None):
+        pass
+
+
+def load(name, path=None, console=None):
+    """
+    create a data source and import a delimited text file into it (.csv -> comma-separated, others -> tab-separated)
+    :param name: either 'a' or 'b'
+    """
+    console = Console() if console is None else console
+    DataSource = data.DataSource(console, name=name, limit=setting.limits, mem=console, log=console)
+    if path is not None:
+        DataSource.reload_file(path)
+    return DataSource
+
+
+def make_option(command, option=None):
+    """
+    merge custom options into the default options of an operation
+    custom options take the same form as setting.operationParam, column selections are given as combo box index
+    (1 = first column, 0 = not selected), e.g. {'optJoinColumns': [1, 0, 2, 0]} joins A's 1st column to B's 2nd column
+    """
+    newOption = data.Parameters()
+    newOption.set({**setting.operationParam[command], **(option or {})})
+    # the options form preselects the first separator
+    if not isinstance(newOption.get('optSeparator', ''), str):
+        newOption['optSeparator'] = setting.sepList[0]
+    return newOption
+
+
+def run(command, DataSourceA, DataSourceB, option=None, log=None):
+    """
+    validate user options, transform the datasets and run operation
+    :return: [result (data rows, header is kept in result.attrs, see mod_writer), record count]
+    """
+    if command not in commands:
+        raise Exception('Operation "{}" is not available in batch mode.'.format(command), 'w')
+    log = Console() if log is None else log
+
+    # validate datasets and user options
+    option = make_option(command, option)
+    vald.validate_source(command, DataSourceA, DataSourceB)
+    warnings = vald.validate_user_option(command, option, DataSourceA, DataSourceB)
+    if len(warnings) > 0:
+        raise Exception(warnings[0], 'w')
+    func.decode_column_selection(option)
+
+    # transform the datasets
+    ErrorTracker = data.ConversionErrorTracker()
+    DataWorkA = data.DataWork()
+    DataWorkB = data.DataWork()
+    sel = option.get('optDataSet')
+    for DataSource, DataWork, side in [(DataSourceA, DataWorkA, 0), (DataSourceB, DataWorkB, 1)]:
+        if (sel == side) or (sel is None):
+            DataWork.copy_df(df=DataSource.df, header=DataSource.header)
+            DataWork.set_column_roles(option, command)
+            DataWork.generate_interim_fields(option, ErrorTracker, log)
+
+    # collect statistic on errors from numeric conversion function
+    for colName, sample in ErrorTracker.collect_sample().items():
+        log.add('Values in [{0}] cannot be converted to number and are treated as 0: "{1}"'.format(
+            colName, '", "'.join(sample)), tag='important')
+
+    # run operation
+    result, recordCount, popUpWindow = operation.run_operation(None, command,
+                                                               DataSourceA, DataSourceB, DataWorkA, DataWorkB,
+                                                               option, log)
+    return [result, recordCount]
+
+
+def write(result, path=None):
+    """
+    write result to a file (.csv -> comma-separated, others -> tab-separated), or to stdout if path is not given
+    """
+    if path is None or path == '-':
+        sys.stdout.write(wrt.render(result, sep='\t', lineEnd='\n'))     # line break is translated by text stream
+    else:
+        sep = ',' if path.lower().endswith('.csv') else '\t'
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(wrt.render(result, sep=sep))
+
+
+def false_positive_rate(text):
+    # argument type of --prefilter, the rate must be strictly between 0 and 1
+    rate = float(text)
+    if not 0 < rate < 1:
+        raise argparse.ArgumentTypeError('false-positive rate must be between 0 and 1 (exclusive): {}'.format(text))
+    return rate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run an operation of Excel Complementary Toolbox without GUI.')
+    parser.add_argument('command', choices=commands, help='operation to run')
+    parser.add_argument('-a', dest='pathA', help='file of dataset A (.csv -> comma-separated, others -> tab-separated)')
+    parser.add_argument('-b', dest='pathB', help='file of dataset B (.csv -> comma-separated, others -> tab-separated)')
+    parser.add_argument('-o', dest='output', default='-', help='output file (default: stdout)')
+    parser.add_argument('--option', default='{}', help='user options as JSON, in the same form as setting.operationParam')
+    parser.add_argument('--max-row', type=int, help='maximum number of rows read from each dataset')
+    parser.add_argument('--max-col', type=int, help='maximum number of columns read from each dataset')
+    parser.add_argument('--max-join-row', type=int, help='maximum number of rows of join result (SQL-mode)')
+    parser.add_argument('--prefilter', type=false_positive_rate, metavar='RATE',
+                        help='check keys of dataset A against a Bloom filter over keys of dataset B first (join and '
+                             'exception, dataset A of {:,} rows or more), at this false-positive rate, e.g. 0.01'.format(
+                                 setting.prefilter['minRows']))
+    parser.add_argument('-q', '--quiet', action='store_true', help='suppress messages')
+    parser.add_argument('--instrument', action='store_true', help='print time spent on every stage')
+    args = parser.parse_args(argv)
+
+    console = Console(quiet=args.quiet)
+    try:
+        # adjust limit settings (affects the current process only)
+        if args.max_row is not None:
+            setting.limits['maxRow'] = args.max_row
+        if args.max_col is not None:
+            setting.limits['maxCol'] = args.max_col
+        if args.max_join_row is not None:
+            setting.limits['maxJoinRow'] = args.max_join_row
+        if args.prefilter is not None:
+            setting.prefilter.update({'enabled': 1, 'falsePositiveRate': args.prefilter})
+        if args.instrument:
+            setting.instrument['enabled'] = 1
+
+        DataSourceA = load('a', args.pathA, console)
+        DataSourceB = load('b', args.pathB, console)
+        inst.recorder.begin(setting.alias[args.command])
+        result, recordCount = run(args.command, DataSourceA, DataSourceB, json.loads(args.option), console)
+        with inst.recorder.stage('write output', rowsIn=len(result)):
+            write(result, args.output)
+        inst.recorder.end(console)
+        console.add(setting.alias[args.command] + ' - Complete ({0:,} rows of result).'.format(recordCount))
+    except Exception as e:
+        print('Error: ' + str(e.args[0] if e.args else e), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+
+# ------------------------------------------------------ #
+# Benchmark
+# ------------------------------------------------------ #
+# time every operation on synthetic datasets of controlled size and shape, for instance:
+#   python benchmark.py --rows 10000 100000 1000000 -o report.json
+#   python benchmark.py --rows 10000 --compare report.json
+# the report is a JSON file, which can be compared against the report of another version
+# string cases are timed once for every string storage available (Python objects, and Arrow if pyarrow is installed)
+
+import setting
+import mod_data as data
+import mod_function as func
+import mod_writer as wrt
+import batch as batch
+import operation as operation
+
+import argparse
+import copy
+import json
+import numpy as np
+import pandas as pd
+import platform
+import sys
+import time
+import tracemalloc
+
+# options of every operation (same form as setting.operationParam), based on the layout of synthetic datasets:
+# [key1, key2, text, amount1, amount2]
+caseOption = {
+    'run_join': {'optJoinColumns': [1, 2, 1, 2]},
+    'run_aggregation': {'optAggNum': [4, 5], 'optAggText': [3]},
+    'run_compare_value': {'optDeltaColumns': [4, 5]},
+    'run_exception': {},
+    'run_connection': {}
+}
+
+
+def make_dataset(rows, cardinality, skew, width, overlap, seed):
+    """
+    generate a pair of synthetic datasets (header included as the 1st row)
+    :param rows: number of data rows in each dataset
+    :param cardinality: number of distinct keys
+    :param skew: exponent of Zipf-like key distribution (0 = uniform, larger value = more concentrated on hot keys)
+    :param width: number of characters in text values
+    :param overlap: fraction of keys in dataset B that also exist in dataset A
+    :return: [dataset A, dataset B, connection dataset (2 columns)]
+    """
+    rng = np.random.default_rng(seed)
+
+    # key distribution
+    weight = 1.0 / np.power(np.arange(1, cardinality + 1), skew)
+    weight /= weight.sum()
+
+    # pool of text values in random letter case, e.g. 'aBcD', 'AbCd'
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    pool = [''.join(w) for w in rng.choice(letters, size=(cardinality, width))]
+    pool = np.array(pool, dtype=object)
+
+    def sample(offset):
+        ids = rng.choice(cardinality, size=rows, p=weight) + offset
+        text = pool[ids % cardinality]
+        upper = rng.random(rows) < 0.5
+        df = pd.DataFrame({
+            0: np.char.add('K', (ids % (cardinality * 2)).astype(str)).astype(object),
+            1: (ids % 97).astype(str).astype(object),
+            2: np.where(upper, [t.upper() for t in text], text),
+            3: rng.integers(0, 100000, rows) / 100,
+            4: rng.integers(0, 1000, rows).astype(float)
+        })
+        header = pd.DataFrame([['key1', 'key2', 'text', 'amount1', 'amount2']], columns=df.columns)
+        return pd.concat([header, df], axis=0, ignore_index=True)
+
+    dfA = sample(0)
+    # shift part of keys in dataset B out of the key range of dataset A
+    dfB = sample(0 if overlap >= 1 else int(round(cardinality * (1 - overlap))))
+
+    # pairs of related elements for connection
+    edges = pd.DataFrame({
+        0: np.char.add('N', rng.choice(cardinality, size=rows, p=weight).astype(str)).astype(object),
+        1: np.char.add('N', rng.integers(0, cardinality, rows).astype(str)).astype(object)
+    })
+    dfC = pd.concat([pd.DataFrame([['from', 'to']], columns=edges.columns), edges], axis=0, ignore_index=True)
+
+    return [dfA, dfB, dfC]
+
+
+def measure(task, memory, setup=None):
+    """
+    :param setup: if specified, it is called before every run (not timed) and its return values are passed to task
+    :return: [return value of task, elapsed seconds, peak memory in MB (None if not measured)]
+    """
+    setup = (lambda: ()) if setup is None else setup
+    args = setup()
+    start = time.perf_counter()
+    result = task(*args)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        # measure memory in a separate run, as tracing slows down execution
+        args = setup()
+        tracemalloc.start()
+        task(*args)
+        peak = tracemalloc.get_traced_memory()[1] / 1048576
+        tracemalloc.stop()
+    return [result, elapsed, peak]
+
+
+def transform(command, DataSource, option):
+    DataWork = data.DataWork()
+    DataWork.copy_df(df=DataSource.df, header=DataSource.header)
+    DataWork.set_column_roles(option, command)
+    DataWork.generate_interim_fields(option, data.ConversionErrorTracker(), None)
+    return DataWork
+
+
+def clone(DataWork):
+    new = copy.copy(DataWork)
+    new.df = DataWork.df.copy()
+    return new
+
+
+def run_case(rows, args):
+    dfA, dfB, dfC = make_dataset(rows, max(1, int(rows * args.cardinality)), args.skew, args.width, args.overlap,
+                                 args.seed)
+    console = batch.Console(quiet=True)
+    results = []
+
+    def record(case, elapsed, peak, resultRows=None, resultMB=None):
+        results.append({'case': case, 'rows': rows, 'seconds': round(elapsed, 4),
+                        'peakMB': None if peak is None else round(peak, 1), 'resultRows': resultRows,
+                        'resultMB': None if resultMB is None else round(resultMB, 1)})
+        print('{:>10,} rows  {:<56}{:>10.3f}s{}{}'.format(
+            rows, case, elapsed, '' if peak is None else '{:>10.1f}MB'.format(peak),
+            '' if resultMB is None else '{:>10.1f}MB held'.format(resultMB)), file=sys.stderr)
+
+    for command, custom in caseOption.items():
+        DataSourceA = batch.load('a', console=console)
+        DataSourceB = batch.load('b', console=console)
+        DataSourceA.reload(df=dfC if command == 'run_connection' else dfA)
+        if command != 'run_connection':
+            DataSourceB.reload(df=dfB)
+
+        option = batch.make_option(command, custom)
+        func.decode_column_selection(option)
+
+        # transformation (key normalization and numeric conversion) is timed separately from the operation
+        DataWorkA, elapsed, peak = measure(lambda: transform(command, DataSourceA, option), args.memory)
+        record(command + ':transform', elapsed, peak)
+        DataWorkB = data.DataWork()
+        if command != 'run_connection':
+            DataWorkB = transform(command, DataSourceB, option)
+
+        # operation runs on a fresh copy of the interim datasets in every round, as some operations modify them
+        (result, recordCount, popUpWindow), elapsed, peak = measure(
+            lambda A, B: operation.run_operation(None, command, DataSourceA, DataSourceB, A, B, option),
+            args.memory,
+            setup=lambda: (clone(DataWorkA), clone(DataWorkB)))
+        record(command, elapsed, peak, recordCount)
+
+        # rendering the result into text (as copied to clipboard)
+        _, elapsed, peak = measure(lambda: wrt.render(result), args.memory)
+        record(command + ':write', elapsed, peak)
+
+    # letter case alignment on the text column
+    column = dfA.iloc[1:, [2]]
+    _, elapsed, peak = measure(lambda df: func.df_align_case(df, [2]), args.memory, setup=lambda: (column.copy(),))
+    record('df_align_case', elapsed, peak)
+
+    # string storage of a key column -> normalization and letter case alignment, and memory held by the outcome
+    # note: memory allocated by pyarrow is not traced, therefore size of the outcome is reported as well
+    default = setting.storage['arrowString']
+    keys = dfA.iloc[1:, [0]]
+    normalize = func.key_normalizer({'optIgnoreCase': 1, 'optTrim': 1})
+    for storage in ['python'] + (['pyarrow'] if func.arrowString is not None else []):
+        setting.storage['arrowString'] = 1 if storage == 'pyarrow' else 0
+        result, elapsed, peak = measure(lambda: normalize(keys[0]), args.memory)
+        record('normalize keys [{}]'.format(storage), elapsed, peak, resultMB=result.memory_usage(deep=True) / 1048576)
+        df, elapsed, peak = measure(lambda df: func.df_align_case(df, [0]) or df, args.memory, setup=lambda: (keys.copy(),))
+        record('df_align_case [{}]'.format(storage), elapsed, peak, resultMB=df[0].memory_usage(deep=True) / 1048576)
+
+    # reconciliation of datasets sharing few keys -> join and exception, where most rows find no match, timed against
+    # dataset B of the same size and against a small dataset B, with and without the prefilter of join keys
+    dfA, dfB, _ = make_dataset(rows, max(1, int(rows * args.cardinality)), args.skew, args.width, args.lowOverlap,
+                               args.seed)
+    shapes = {'': dfB, 'small B, ': dfB.iloc[0:max(1, int(rows * args.smallB)) + 1]}
+    prefilter = dict(setting.prefilter)
+    for storage in ['python'] + (['pyarrow'] if func.arrowString is not None else []):
+        setting.storage['arrowString'] = 1 if storage == 'pyarrow' else 0
+        DataSourceA = batch.load('a', console=console)
+        DataSourceA.reload(df=dfA)
+        for shape, df in shapes.items():
+            DataSourceB = batch.load('b', console=console)
+            DataSourceB.reload(df=df)
+            for command in ['run_join', 'run_exception']:
+                option = batch.make_option(command, caseOption[command])
+                func.decode_column_selection(option)
+                DataWorkA = transform(command, DataSourceA, option)
+                DataWorkB = transform(command, DataSourceB, option)
+                for enabled in [0, 1]:
+                    setting.prefilter.update({'enabled': enabled, 'minRows': 0})
+                    (result, recordCount, popUpWindow), elapsed, peak = measure(
+                        lambda A, B: operation.run_operation(None, command, DataSourceA, DataSourceB, A, B, option),
+                        args.memory,
+                        setup=lambda: (clone(DataWorkA), clone(DataWorkB)))
+                    record('{} [low overlap, {}{}{}]'.format(command, shape, storage, ', prefilter' if enabled else ''),
+                           elapsed, peak, recordCount)
+    setting.storage['arrowString'] = default
+    setting.prefilter.update(prefilter)
+
+    return results
+
+
+def compare(report, baseline):
+    """
+    print the ratio of elapsed time and peak memory between the current report and a baseline report
+    """
+    old = {(r['case'], r['rows']): r for r in baseline['results']}
+    print('{:>10} {:<56}{:>10}{:>10}{:>9}{:>10}'.format('rows', 'case', 'before', 'after', 'ratio', 'memory'))
+    for r in report['results']:
+        b = old.get((r['case'], r['rows']))
+        if b is None:
+            continue
+        ratio = r['seconds'] / b['seconds'] if b['seconds'] > 0 else float('nan')
+        memory = (r['peakMB'] / b['peakMB']) if (r['peakMB'] and b['peakMB']) else float('nan')
+        print('{:>10,} {:<56}{:>9.3f}s{:>9.3f}s{:>8.2f}x{:>9.2f}x'.format(
+            r['rows'], r['case'], b['seconds'], r['seconds'], ratio, memory))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark all operations on synthetic datasets.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000], help='dataset sizes')
+    parser.add_argument('--cardinality', type=float, default=0.1, help='distinct keys as a fraction of rows')
+    parser.add_argument('--skew', type=float, default=1.0, help='key skew (0 = uniform)')
+    parser.add_argument('--width', type=int, default=12, help='number of characters in text values')
+    parser.add_argument('--overlap', type=float, default=0.9, help='fraction of keys in B shared with A')
+    parser.add_argument('--low-overlap', dest='lowOverlap', type=float, default=0.05,
+                        help='fraction of keys in B shared with A in the low-overlap scenario')
+    parser.add_argument('--small-b', dest='smallB', type=float, default=0.02,
+                        help='rows of the small dataset B (as a fraction of rows) in the low-overlap scenario')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip peak memory measurement')
+    parser.add_argument('-o', dest='output', help='write report to this JSON file')
+    parser.add_argument('--compare', help='compare against a previous JSON report')
+    args = parser.parse_args(argv)
+
+    # datasets must not be truncated, nor join result refused
+    setting.limits['maxRow'] = max(setting.limits['maxRow'], max(args.rows))
+    setting.limits['maxJoinRow'] = float('inf')
+
+    report = {
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                        'platform': platform.platform()},
+        'parameters': {k: v for k, v in vars(args).items() if k not in ['output', 'compare']},
+        'results': []
+    }
+    for rows in args.rows:
+        report['results'] += run_case(rows, args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    elif not args.output:
+        json.dump(report, sys.stdout, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,8 +3,11 @@ import setting
 import mod_data as data
 import mod_gui as gui
 import mod_function as func
+import mod_instrument as inst
 import mod_style as sty
 import mod_validate as vald
+import mod_worker as worker
+import mod_writer as wrt
 import operation as operation
 
 import contextlib
@@ -16,6 +19,8 @@ import tkinter.ttk as ttk
 
 class MainApp(tk.Tk):
 
+    pollInterval = 100                      # interval (in ms) for checking the progress of background job
+
     def __init__(self):
         super(MainApp, self).__init__()
 
@@ -123,10 +128,11 @@ class MainApp(tk.Tk):
             ttk.Button(frame, command=lambda: self.load_test_data(), text='Load Test Data').grid(row=0, column=1)
             ttk.Button(frame, command=lambda: self.dump_data(self), text='dump').grid(row=0, column=2)
 
-    def transform_data(self, DataSource, DataWork, command):
-        DataWork.copy_df(df=DataSource.df)
+    def transform_data(self, job, DataSource, DataWork, command):
+        # runs in a background job -> messages go to the job, which hands them over to Message Window
+        DataWork.copy_df(df=DataSource.df, header=DataSource.header, version=DataSource.version)
         DataWork.set_column_roles(self.Option, command)
-        DataWork.generate_interim_fields(self.Option, self.ErrorTracker, self.Log)
+        DataWork.generate_interim_fields(self.Option, self.ErrorTracker, job.log, job)
 
     def generate_result(self, command):
         # display popup warning when basic requirement is not fulfilled
@@ -148,14 +154,63 @@ class MainApp(tk.Tk):
         if param['commit'] == 0:
             return
 
-        self.waiting_message('show')
+        self.start_job(command)
+
+    def start_job(self, command):
+        # run transformation and operation in a background job, the main window stays responsive in the meantime
+        inst.recorder.begin(setting.alias[command])
+        self.Job = worker.Job(self.execute, command)
+        self.Progress = gui.ProgressForm(self, setting.alias[command], self.Job)
+        self.Job.start()
+        self.after(self.pollInterval, self.poll_result, command)
 
+    def execute(self, job, command):
+        """
+        transform the datasets and run operation, this function runs in a background job
+        note: visual objects (including Message Window and clipboard) must not be accessed here
+        """
         # transform the datasets
         sel = self.Option.get('optDataSet')
         if (sel == 0) or (sel is None):
-            self.transform_data(self.DataSourceA, self.DataWorkA, command)
+            job.update('Transforming Dataset A', 0.1)
+            self.transform_data(job, self.DataSourceA, self.DataWorkA, command)
         if (sel == 1) or (sel is None):
-            self.transform_data(self.DataSourceB, self.DataWorkB, command)
+            job.update('Transforming Dataset B', 0.3)
+            self.transform_data(job, self.DataSourceB, self.DataWorkB, command)
+
+        # profiling creates its own visual objects, therefore it is left to the main thread
+        if command == 'run_profiling':
+            return None
+
+        # run operation
+        job.update('Running ' + setting.alias[command], 0.5)
+        result, count, complete = operation.run_operation(self, command,
+                                                          self.DataSourceA, self.DataSourceB,
+                                                          self.DataWorkA, self.DataWorkB,
+                                                          self.Option, job.log, job)
+
+        # render result into text here, only handing it to clipboard is left to the main thread
+        job.update('Writing result', 0.9)
+        with inst.recorder.stage('write result', rowsIn=len(result)):
+            text = wrt.render(result, job=job)
+        return [text, count, complete]
+
+    def poll_result(self, command):
+        """
+        check the background job periodically, and hand back its result to the main thread upon completion
+        """
+        job = self.Job
+
+        # print messages posted by the background job
+        job.log.flush(self.Log)
+
+        # job is still running -> refresh progress and check again later
+        if job.is_alive():
+            self.Progress.refresh()
+            self.after(self.pollInterval, self.poll_result, command)
+            return
+
+        self.Progress.destroy()
 
         # collect statistic on errors from numeric conversion function
         failSample = self.ErrorTracker.collect_sample()
@@ -165,13 +220,43 @@ class MainApp(tk.Tk):
                 colName = colName if len(colName) < 20 else colName[:20] + '...'
                 self.Log.add('➜【{0}】 ‟{1}” '.format(colName, '”, ‟'.join(sample)), tag='important')
 
-        # run operation
-        count, complete = operation.run_operation(self, command,
-                                                  self.DataSourceA, self.DataSourceB, self.DataWorkA, self.DataWorkB,
-                                                  self.Option)
-
+        # hand back exception raised in the background job (result is discarded if user cancelled the job)
+        if isinstance(job.error, worker.JobCancelled) or job.cancelEvent.is_set():
+            self.Log.add(setting.alias[command] + ' - Cancelled.', tag='important')
+            inst.recorder.end(self.Log)
+            return
+        elif isinstance(job.error, operation.ResultTooLarge):
+            # result exceeds the limit -> offer VLookup-mode, which returns one row for every row of dataset A
+            inst.recorder.end()
+            if func.confirm(job.error.args[0] + '\n\nSwitch to VLookup-mode and run again?'):
+                self.Option['optJoinMode'] = 1
+                self.Log.add(setting.alias[command] + ' - Switched to VLookup-mode.', tag='important')
+                self.start_job(command)
+            else:
+                self.Log.add(setting.alias[command] + ' - Cancelled.', tag='important')
+            return
+        elif job.error is not None:
+            inst.recorder.end()
+            raise job.error
+
+        # run operation (profiling only) or retrieve the result of operation (rendered as text)
+        if command == 'run_profiling':
+            text = None
+            result, count, complete = operation.run_operation(self, command,
+                                                              self.DataSourceA, self.DataSourceB,
+                                                              self.DataWorkA, self.DataWorkB,
+                                                              self.Option)
+        else:
+            text, count, complete = job.result
+
+        # copy result to clipboard
+        self.waiting_message('show')
+        wrt.to_clipboard(text)
         self.waiting_message('hide')
 
+        # print time spent on every stage (if enabled in setting)
+        inst.recorder.end(self.Log)
+
         # show record count
         if count >= 0:
             self.Log.add(setting.alias[command] + ' - Complete ({0:,} rows of result copied to clipboard).'.format(count))
@@ -199,9 +284,12 @@ class MainApp(tk.Tk):
         temp = self.DataSourceA.df
         self.DataSourceA.df = self.DataSourceB.df
         self.DataSourceB.df = temp
+        self.DataSourceA.header, self.DataSourceB.header = self.DataSourceB.header, self.DataSourceA.header
         # swap columns names
         self.DataSourceA.df.columns = self.DataSourceA.df.columns.map(lambda c: str(c).replace('b', 'a'))
         self.DataSourceB.df.columns = self.DataSourceB.df.columns.map(lambda c: str(c).replace('a', 'b'))
+        self.DataSourceA.renew()
+        self.DataSourceB.renew()
         # refresh Data Previewer
         self.TreeA.tree_refresh()
         self.TreeB.tree_refresh()
@@ -224,7 +312,8 @@ class MainApp(tk.Tk):
         """
         param = {
             'commit': 0,              # to capture whether OK button has been pressed
-            'limit': {}               # a collection of new setting values
+            'limit': {},              # a collection of new setting values
+            'prefilter': {}           # new setting of the prefilter of join keys
         }
 
         # prompt modal form
@@ -236,6 +325,7 @@ class MainApp(tk.Tk):
         # update to new settings
         if param['commit'] == 1:
             setting.limits.update(param['limit'])
+            setting.prefilter.update(param['prefilter'])
 
     """ ---------------------- start debugging assistant ------------------------------ """
     def load_test_data(self):
@@ -5,17 +5,21 @@
 
 import setting
 import mod_function as func
-import mod_style as sty
+import mod_instrument as inst
 import mod_validate as vald
+import mod_worker as worker
 
+import csv
+import io
+import itertools
 import math
 import numbers
 import numpy as np
 import os
 import pandas as pd
 import time
-import tkinter as tk
-import tkinter.ttk as ttk
+
+from pandas.io.clipboard import clipboard_get
 
 
 class DataSource:
@@ -24,7 +28,10 @@ class DataSource:
     1. import contents from clipboard into dataframe.
     2. limit number of rows and columns imported.
     3. the import action is triggered by keyboard event (Ctrl+V) within the data previewer.
+    4. the header row is kept apart from data rows, and every column is stored in a compact type (see compact).
     """
+    versionCounter = itertools.count(1)     # shared by all data sources, so that every version number is unique
+
     def __init__(self, parent, name, limit, mem, log):
         super().__init__()
         self.parent = parent
@@ -32,42 +39,128 @@ class DataSource:
         self.limit = limit
         self.mem = mem              # link to Memory Consumption Reader
         self.log = log              # link to Message Window
-        self.df = pd.DataFrame()
+        self.df = pd.DataFrame()    # data rows only
+        self.header = []            # header row, e.g. [name, type, amount]
+        self.rawShape = (0, 0)      # no. of rows and columns available before truncation (header row included)
+        self.origin = 'Clipboard'   # where the data was read from, e.g. Clipboard or File 'sales.csv'
+        self.version = 0            # changed whenever the dataframe is replaced or altered (see DataWork cache)
 
     def reload(self, df=None, maxRow=None, maxCol=None):
-        self.read_clipboard(df)
+        maxRow = self.limit['maxRow'] if maxRow is None else maxRow
+        maxCol = self.limit['maxCol'] if maxCol is None else maxCol
+        inst.recorder.begin('Data {} import'.format(self.name.upper()))
+        self.read_clipboard(df, maxRow, maxCol)
+        self.restrict(maxRow, maxCol)
+        self.compact()
+        self.renew()
+        self.mem.refresh(self.name, self.df)
+        inst.recorder.end(self.log)
+
+    def reload_file(self, path, maxRow=None, maxCol=None):
+        """
+        import a delimited text file instead of clipboard (.csv -> comma-separated, others -> tab-separated)
+        """
+        maxRow = self.limit['maxRow'] if maxRow is None else maxRow
+        maxCol = self.limit['maxCol'] if maxCol is None else maxCol
+        inst.recorder.begin('Data {} import'.format(self.name.upper()))
+        self.origin = "File '{}'".format(os.path.basename(path))
+        with open(path, encoding='utf-8-sig') as f:
+            text = f.read()
+        with inst.recorder.stage('parse text') as s:
+            if path.lower().endswith('.csv'):
+                self.df = self.parse_text(text, maxRow, maxCol, sep=',', quoting=csv.QUOTE_MINIMAL)
+            else:
+                self.df = self.parse_text(text, maxRow, maxCol)
+            s.rowsOut = len(self.df)
+        self.add_prefix()
         self.restrict(maxRow, maxCol)
+        self.compact()
+        self.renew()
         self.mem.refresh(self.name, self.df)
+        inst.recorder.end(self.log)
+
+    def renew(self):
+        # mark the dataframe as changed -> interim datasets cached by DataWork are discarded
+        self.version = next(self.versionCounter)
 
-    def read_clipboard(self, df=None):
+    def read_clipboard(self, df=None, maxRow=None, maxCol=None):
         self.parent.waiting_message('show')
-        if df is None:
-            self.df = pd.read_clipboard(header=None, index_col=False, low_memory=False, sep='\t', quoting=3)
-        else:
-            # load sample dataset instead of Clipboard -> for testing purpose
-            self.df = df.copy()
-        self.parent.waiting_message('hide')
+        self.origin = 'Clipboard'
+        try:
+            if df is None:
+                with inst.recorder.stage('parse clipboard') as s:
+                    self.df = self.parse_text(clipboard_get(), maxRow, maxCol)
+                    s.rowsOut = len(self.df)
+            else:
+                # load sample dataset instead of Clipboard -> for testing purpose
+                self.rawShape = df.shape
+                self.df = df.iloc[0:maxRow + 1, 0:maxCol].copy()
+        finally:
+            self.parent.waiting_message('hide')
+        self.add_prefix()
+
+    def add_prefix(self):
         # add prefix ('a' or 'b') to all columns
         self.df.columns = self.df.columns.map(lambda c: self.name + str(c))
 
+    def parse_text(self, text, maxRow, maxCol, sep='\t', quoting=csv.QUOTE_NONE):
+        """
+        parse delimited text (header row included) into dataframe, rows and columns beyond the limits are skipped
+        during tokenization, instead of being parsed and discarded afterwards
+        note: every value is read as text, data types are determined later by compact()
+        """
+        if text == '' or text.isspace():
+            raise Exception('{} has no data.'.format(self.origin), 'w')
+        # count lines and columns of the entire text without parsing (columns are counted from the 1st line)
+        lineCount = text.count('\n') + (0 if text.endswith('\n') else 1)
+        end = text.find('\n')
+        firstLine = (text if end < 0 else text[:end]).rstrip('\r')
+        colCount = len(next(csv.reader([firstLine], delimiter=sep, quoting=quoting)))
+        # accommodate header row -> maxRow + 1, parsing stops once enough lines are read
+        df = pd.read_csv(io.StringIO(text), header=None, index_col=False, low_memory=False, sep=sep, quoting=quoting,
+                         dtype=str, nrows=maxRow + 1, usecols=range(min(maxCol, colCount)))
+        # no. of rows is taken from the parser if it reached the end of text, otherwise from line count, which is exact
+        # apart from blank lines, unless quoted values contain line breaks -> the rest of the text is tokenized
+        # (1st column only) in that case
+        rowCount = len(df)
+        if rowCount > maxRow:
+            rowCount = lineCount
+        if rowCount > len(df) and quoting != csv.QUOTE_NONE and '"' in text:
+            rowCount = sum(len(chunk) for chunk in pd.read_csv(io.StringIO(text), header=None, index_col=False, sep=sep,
+                                                               quoting=quoting, dtype=str, usecols=[0], chunksize=1000000))
+        self.rawShape = (rowCount, colCount)
+        return df
+
     def restrict(self, maxRow, maxCol):
-        maxRow = self.limit['maxRow'] if maxRow is None else maxRow
-        maxCol = self.limit['maxCol'] if maxCol is None else maxCol
         # accommodate header row -> maxRow + 1
         maxRow += 1
         # display in Message Window the rows and columns truncated
-        if self.df.shape[0] > maxRow:
-            self.log.add("【Data {0}】Row limit reached. Data {0} was truncated to {1:,} lines.".format(self.name.upper(), maxRow-1), tag='important')
-        if self.df.shape[1] > maxCol:
-            self.log.add("【Data {0}】Column limit reached. Data {0} was truncated to {1:,} columns.".format(self.name.upper(), maxCol), tag='important')
-        # truncate the dataset
+        if self.rawShape[0] > maxRow:
+            self.log.add("【Data {0}】Row limit reached. Data {0} was truncated to {1:,} lines ({2:,} lines skipped).".format(
+                self.name.upper(), maxRow-1, self.rawShape[0]-maxRow), tag='important')
+        if self.rawShape[1] > maxCol:
+            self.log.add("【Data {0}】Column limit reached. Data {0} was truncated to {1:,} columns ({2:,} columns skipped).".format(
+                self.name.upper(), maxCol, self.rawShape[1]-maxCol), tag='important')
+        # truncate the dataset (normally done during import already)
         self.df = self.df.iloc[0:maxRow, 0:maxCol]
         # check empty after truncate took place
         if len(self.df) <= 1:
-            raise Exception('Clipboard has no data.', 'w')
+            raise Exception('{} has no data.'.format(self.origin), 'w')
         else:
             self.log.add("【Data {}】{:,} rows {:,} columns read.".format(self.name.upper(), self.df.shape[0]-1, self.df.shape[1]))
 
+    def compact(self):
+        """
+        separate the header row from data rows, and store every column in the most compact type that keeps the
+        displayed value of every cell (numbers, category or string, see func.compact_column)
+        """
+        with inst.recorder.stage('compact columns', rowsIn=len(self.df)) as s:
+            self.header = self.df.iloc[0, :].tolist()
+            body = self.df.iloc[1:]
+            self.df = pd.DataFrame({c: func.compact_column(body[c], setting.storage['categoryRatio'])
+                                    for c in body.columns})
+            s.rowsOut = len(self.df)
+
 
 class DataWork:
     """
@@ -79,10 +172,17 @@ class DataWork:
     """
     def __init__(self):
         self.df = pd.DataFrame()
+        # cache of the last transformation -> reused while data source stays the same (see copy_df)
+        self.cache = {
+            'version': None,                # version of data source
+            'base': None,                   # data rows of data source (not copied)
+            'key': dict(),                  # {(column, normalization options): transformed key column}
+            'value': dict()                 # {(column, conversion options): [converted column, failure status]}
+        }
         # create variables -> to keep original column info
         self.origCol = {
             'id': [],                       # sequential id of the original field, e.g. [0, 1, 2]
-            'name': [],                     # original header (as in the 1st data row), e.g. [name, type, amount]
+            'name': [],                     # original header (header row of data source), e.g. [name, type, amount]
             'mapping': dict(),              # [id]->[name] mappings, e.g. {[0: 'name', 1: 'type', 2: 'amount']}
             'key': [],                      # columns categorized as key type (id + prefix), e.g. [a0, a1]
             'num': []                       # columns categorized as numeric type (id + prefix), e.g. [a3, a4]
@@ -98,20 +198,27 @@ class DataWork:
             'err': []                       # conversion error indicator (created new column)
         }
 
-    def copy_df(self, df):
-        self.df = df.copy()
-        self.get_col_map()                  # note: get column name mapping based on 1st row
-        self.pop_first_row()                # discard 1st row
-
-    def get_col_map(self):
-        self.origCol['id'] = self.df.columns.astype(str).tolist()
-        self.origCol['name'] = self.df.iloc[0, :].astype(str).tolist()
+    def copy_df(self, df, header, version=None):
+        """
+        take data rows of data source without copying them, the header row is kept separately in origCol
+        :param header: header row of data source
+        :param version: version of data source, if it is the same as last time, the previous transformation is reused
+        """
+        if version is None or version != self.cache['version']:
+            with inst.recorder.stage('prepare data', rowsIn=len(df)) as s:
+                self.get_col_map(df, header)    # note: get column name mapping based on header row
+                s.rowsOut = len(df)
+            self.cache = {'version': version, 'base': df, 'key': dict(), 'value': dict()}
+        # work on a shallow copy, only derived columns (key, value, uid, err) are allocated
+        # note: operations must not modify the values of existing columns in place
+        self.df = self.cache['base'].copy(deep=False)
+
+    def get_col_map(self, df, header):
+        self.origCol['id'] = df.columns.astype(str).tolist()
+        self.origCol['name'] = [str(h) for h in header]
         for c1, c2 in zip(self.origCol['id'], self.origCol['name']):
             self.origCol['mapping'][c1] = c2
 
-    def pop_first_row(self):
-        self.df.drop(self.df.head(1).index, axis=0, inplace=True)
-
     def set_column_roles(self, option, command):
         df = self.df
         side = df.columns[0][0:1]                                                   # value either 'a' or 'b'
@@ -126,7 +233,8 @@ class DataWork:
             #     # Numeric columns are the rightmost n columns
             #     num = df.columns[-1 * param['optDeltaColumns']:].tolist()
         elif 'optAggNum' in option:
-            num = [side + str(id) for id in option['optAggNum']]
+            # a column may be selected more than once (with different aggregation functions)
+            num = list(dict.fromkeys([side + str(id) for id in option['optAggNum']]))
 
         # (2) determine key columns
         if 'optJoinColumns' in option:
@@ -145,10 +253,12 @@ class DataWork:
         self.origCol['num'] = num
         self.origCol['key'] = key
 
-    def generate_interim_fields(self, option, errorTracker, log):
+    def generate_interim_fields(self, option, errorTracker, log, job=None):
         """
         transform key fields and numeric fields, and insert transformed data as new columns
+        :param job: background job running the transformation (see mod_worker), checked for cancellation per column
         """
+        job = worker.ForegroundJob() if job is None else job
         df = self.df
         side = df.columns[0][0:1]
 
@@ -158,32 +268,38 @@ class DataWork:
         # initialize variable for column group assignment
         self.colGrp = {key: [] for key in self.colGrp}
 
+        # compile transformation of key columns once for all columns
+        normalize = func.key_normalizer(option)
+        keyOption = tuple(option.get(k) for k in ['optIgnoreCase', 'optTrim', 'optTrimZero', 'optPartialMatch'])
+        valueOption = option.get('optWipeComma')
+
         # iterate over every column, transform data, and assign each column to a group
         oldColumns = df.columns
         for oldColumn in oldColumns:
+            job.checkpoint()
             # transform key columns
             if oldColumn in self.origCol['key']:
                 newColumn = oldColumn + '_join_key'
-                # convert entire column to string type
-                df[newColumn] = df[oldColumn].astype('string')
-                # transform values according to user instruction
-                if option.get('optIgnoreCase') == 1:
-                    df[newColumn] = df[newColumn].str.lower()
-                if option.get('optTrim') == 1:
-                    df[newColumn] = df[newColumn].str.strip()
-                if option.get('optTrimZero') == 1:
-                    df[newColumn] = df[newColumn].str.lstrip('0')
-                if option.get('optPartialMatch', np.NAN) >= 1:
-                    df[newColumn] = df[newColumn].str[0: option['optPartialMatch']]
+                # convert entire column to string type and transform values according to user instruction
+                # (a column transformed with the same options before is reused)
+                cacheKey = (oldColumn, keyOption)
+                if cacheKey not in self.cache['key']:
+                    with inst.recorder.stage('normalize keys', rowsIn=len(df)):
+                        self.cache['key'][cacheKey] = normalize(df[oldColumn])
+                df[newColumn] = self.cache['key'][cacheKey]
                 # assign column group
                 self.colGrp['key'].append(oldColumn)
                 self.colGrp['joinKey'].append(newColumn)
             # transform numeric columns
             elif oldColumn in self.origCol['num']:
                 newColumn = oldColumn + '_value'
-                # convert data into numeric type with custom function
-                df[newColumn] = df[oldColumn].apply(func.to_val, optWipeComma=option.get('optWipeComma'))
-                errorTracker.update_tracking(df[oldColumn], self.origCol['mapping'][oldColumn])
+                # convert data into numeric type with custom function (a column converted before is reused)
+                cacheKey = (oldColumn, valueOption)
+                if cacheKey not in self.cache['value']:
+                    with inst.recorder.stage('convert values', rowsIn=len(df)):
+                        self.cache['value'][cacheKey] = func.to_val(df[oldColumn], optWipeComma=valueOption)
+                df[newColumn], failure = self.cache['value'][cacheKey]
+                errorTracker.update_tracking(df[oldColumn], self.origCol['mapping'][oldColumn], failure)
                 # assign column group
                 self.colGrp['value'].append(oldColumn)
                 self.colGrp['adjValue'].append(newColumn)
@@ -218,20 +334,20 @@ class ConversionErrorTracker:
     trace error occurred during numeric conversion
     """
     def __init__(self):
-        # create a list that stores total error count for every single row
-        self.failCount = []
+        # create an array that stores total error count for every single row
+        self.failCount = np.zeros(0, dtype='int64')
         # create a dict that stores the original value that caused conversion error
         self.failSample = dict()
 
     def begin_tracking(self, df):
-        func.to_val.failStatus = []                             # clear previous result
-        self.failCount = [0] * len(df)                          # initialize variable (list size must match dataframe height)
+        self.failCount = np.zeros(len(df), dtype='int64')      # initialize variable (array size must match dataframe height)
 
-    def update_tracking(self, column: pd.Series, colName):
-        booleans = func.to_val.failStatus                       # error status for every row (success=False; failure=True)
-        func.to_val.failStatus = []                             # clean up
+    def update_tracking(self, column: pd.Series, colName, booleans):
+        """
+        :param booleans: error status for every row (success=False; failure=True)
+        """
         # accumulate the error count from every column
-        self.failCount = [x + int(y) for x, y in zip(self.failCount, booleans)]
+        self.failCount += booleans
         # identify and retrieve values that caused conversion error
         selection = column[booleans].tolist()                   # select values from rows with conversion error
         sample = func.get_unique_item(selection, n=5)           # draw n samples out of the selected values
@@ -0,0 +1,450 @@
+
+# ------------------------------------------------------ #
+# Computation Engines
+# ------------------------------------------------------ #
+
+import concurrent.futures
+import math
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from multiprocessing import shared_memory
+
+
+class DisjointSet:
+    """
+    union-find structure over integer IDs (0 to n-1)
+    1. union by rank keeps every tree shallow
+    2. path compression flattens the tree whenever an element is looked up
+    """
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.rank = [0] * n
+
+    def find(self, x):
+        parent = self.parent
+        # locate the root of the tree
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        # path compression -> link every element on the path directly to the root
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, x, y):
+        rootX = self.find(x)
+        rootY = self.find(y)
+        if rootX == rootY:
+            return
+        # union by rank -> attach the shorter tree under the taller tree
+        rank = self.rank
+        if rank[rootX] < rank[rootY]:
+            rootX, rootY = rootY, rootX
+        self.parent[rootY] = rootX
+        if rank[rootX] == rank[rootY]:
+            rank[rootX] += 1
+
+    def labels(self):
+        """
+        :return: a list in which each element is labelled by the root of its group
+        """
+        return [self.find(x) for x in range(len(self.parent))]
+
+
+def connected_components(id1, id2, n):
+    """
+    group elements connected by pairs (id1[i], id2[i]) into connected components
+    :param id1: numeric IDs (0 to n-1) of the first element of every pair, missing element is marked as -1
+    :param id2: numeric IDs (0 to n-1) of the second element of every pair, missing element is marked as -1
+    :param n: total number of distinct elements
+    :return: [member, group] -> member IDs in order of first appearance, and the group number (starting from 1) of
+             each member, group numbers are assigned in order of first appearance as well
+    """
+    dsu = DisjointSet(n)
+    for x, y in zip(id1.tolist(), id2.tolist()):
+        if x >= 0 and y >= 0:
+            dsu.union(x, y)
+    root = np.array(dsu.labels(), dtype='int64')
+
+    # list every element in order of first appearance ([a, b], [c, d] -> a, b, c, d)
+    order = np.column_stack([id1, id2]).ravel()
+    member = pd.unique(order[order >= 0])
+
+    # number the groups in order of first appearance, and keep members of the same group together
+    group = pd.factorize(root[member])[0] + 1
+    pos = np.argsort(group, kind='stable')
+    return [member[pos], group[pos]]
+
+
+def encode_keys(keysA, keysB):
+    """
+    map composite keys of dataset A and B into one shared space of integer codes, so that rows are matched by
+    comparing a single integer instead of a tuple of strings
+    1. every key column is factorized jointly with its counterpart, i.e. both datasets share one dictionary
+    2. missing value gets a code of its own, hence missing values match each other (same as pandas merge)
+    3. codes of key columns are combined column by column, and re-numbered whenever they grow too large
+    4. Python strings are factorized as objects, hashing then reuses the hash cached in every string object, instead
+       of encoding every value into UTF-8 again (Arrow strings are factorized by Arrow itself)
+    :param keysA: dataframe of key columns in dataset A
+    :param keysB: dataframe of key columns in dataset B (same number of columns as keysA)
+    :return: [codes of dataset A, codes of dataset B], both are int64 arrays
+    """
+    lenA = len(keysA)
+    code = np.zeros(lenA + len(keysB), dtype='int64')
+    size = 1
+    for i in range(keysA.shape[1]):
+        column = pd.concat([keysA.iloc[:, i], keysB.iloc[:, i]], ignore_index=True)
+        if isinstance(column.dtype, pd.StringDtype) and column.dtype.storage == 'python':
+            column = column.to_numpy(dtype=object)
+        codeCol, uniques = pd.factorize(column)
+        codeCol[codeCol < 0] = len(uniques)         # missing value
+        code = code * (len(uniques) + 1) + codeCol
+        size *= len(uniques) + 1
+        # keep codes within int32 range by re-numbering the distinct combinations
+        if size > np.iinfo('int32').max:
+            code, uniques = pd.factorize(code)
+            size = len(uniques)
+    return [code[:lenA], code[lenA:]]
+
+
+def hash_keys(keys):
+    """
+    hash composite keys into one 64-bit integer per row, equal keys get equal hashes whether they are held in Python or
+    Arrow strings
+    1. every key column is factorized (as in encode_keys), only distinct values are hashed by Python and the hashes
+       are broadcast back to all rows
+    2. missing value gets a hash of its own, hashes of key columns are combined column by column
+    :param keys: dataframe of key columns
+    :return: uint64 array
+    """
+    code = np.zeros(len(keys), dtype='uint64')
+    for i in range(keys.shape[1]):
+        column = keys.iloc[:, i]
+        if isinstance(column.dtype, pd.StringDtype) and column.dtype.storage == 'python':
+            column = column.to_numpy(dtype=object)
+        codeCol, uniques = pd.factorize(column)
+        uniques = np.asarray(uniques, dtype=object)
+        value = np.fromiter(map(hash, uniques), dtype='int64', count=len(uniques)).view('uint64')
+        # missing value (code -1) picks the constant appended, '' is not taken as missing as hash('') is 0
+        value = np.append(value, np.uint64(0x9E3779B97F4A7C15))[codeCol]
+        code = code * np.uint64(1099511628211) ^ value        # multiplied first, so that the order of columns matters
+    return code
+
+
+class BloomFilter:
+    """
+    compact set of 64-bit hashes (e.g. from hash_keys) held in a bit array, which tells whether a hash may be in the set
+    1. a hash added is always found (no false negative), a hash not added is found at the chosen false-positive rate
+    2. every hash sets k bits, their positions are derived from the hash itself and its upper 32 bits (double hashing)
+    3. the number of bits is rounded up to a power of 2, so that positions are taken by bit mask instead of division
+    """
+    def __init__(self, hashes, falsePositiveRate):
+        if not 0 < falsePositiveRate < 1:
+            raise ValueError('False-positive rate must be between 0 and 1 (exclusive).')
+        n = max(len(hashes), 1)
+        # optimal number of bits, and of bits set by every hash, for n hashes at the given false-positive rate
+        bits = -n * math.log(falsePositiveRate) / math.log(2) ** 2
+        self.hashCount = max(1, round(bits / n * math.log(2)))
+        self.mask = np.uint64((1 << max(3, math.ceil(math.log2(bits)))) - 1)
+        # bits are set in place, bit j of the array is bit (j % 8) of byte j // 8 (little-endian bit order)
+        self.bits = np.zeros((int(self.mask) + 1) // 8, dtype='uint8')
+        for i in range(self.hashCount):
+            position = self.position(hashes, i)
+            np.bitwise_or.at(self.bits, (position >> np.uint64(3)).astype('intp'),
+                             np.left_shift(np.uint8(1), (position & np.uint64(7)).astype('uint8')))
+
+    def position(self, hashes, i):
+        # position of the i-th bit of every hash (uint64 arithmetic wraps around)
+        return (hashes + np.uint64(i) * ((hashes >> np.uint64(32)) | np.uint64(1))) & self.mask
+
+    def contains(self, hashes):
+        """
+        :return: boolean array -> False if the hash was definitely not added
+        """
+        hashes = np.asarray(hashes, dtype='uint64')
+        rows = np.arange(len(hashes))
+        # a hash is dropped at its 1st bit not set, only the remaining hashes are checked against the next bit
+        for i in range(self.hashCount):
+            position = self.position(hashes[rows], i)
+            bit = self.bits[position >> np.uint64(3)] >> (position & np.uint64(7)).astype('uint8')
+            rows = rows[(bit & 1) == 1]
+        found = np.zeros(len(hashes), dtype=bool)
+        found[rows] = True
+        return found
+
+
+def encode_keys_prefiltered(keysA, keysB, falsePositiveRate):
+    """
+    same as encode_keys, except that rows of A whose key is definitely not in B are found first by a Bloom filter over
+    the keys of B, and only the remaining rows of A are encoded exactly along with B
+    1. rows of A left out are coded by their key hash turned negative, such codes never occur in B (codes of B are
+       never negative), and rows sharing the same key share the same code
+    2. every key of A is still read once for hashing, the saving is on encoding and matching the rows left out, hence
+       it pays off only when few keys of A are found in B and B is small compared to A
+    :param falsePositiveRate: fraction of rows of A without match that still pass the filter (and are encoded exactly)
+    :return: [codes of dataset A, codes of dataset B], both are int64 arrays
+    """
+    hashA = hash_keys(keysA)
+    candidate = BloomFilter(hash_keys(keysB), falsePositiveRate).contains(hashA)
+    codeA = np.empty(len(keysA), dtype='int64')
+    codeCandidate, codeB = encode_keys(keysA[candidate], keysB)
+    codeA[candidate] = codeCandidate
+    codeA[~candidate] = -1 - (hashA[~candidate] >> np.uint64(1)).astype('int64')
+    return [codeA, codeB]
+
+
+def first_index(codes, n):
+    """
+    find the position of the first row of every code, regardless of the order in which codes appear
+    :param codes: integer code of every row, ranging from 0 to n - 1
+    :param n: number of distinct codes
+    :return: int64 array of length n -> position of the first row holding each code (-1 if the code is absent)
+    """
+    codes = np.asarray(codes)
+    # every position is offered to its code and the smallest one is kept, absent codes stay at the upper bound
+    first = np.full(n, len(codes), dtype='int64')
+    np.minimum.at(first, codes, np.arange(len(codes), dtype='int64'))
+    first[first == len(codes)] = -1
+    return first
+
+
+def lookup_join(codeA, codeB):
+    """
+    find the first match in dataset B for every row of dataset A (lookup / VLookup semantics), without building
+    the product of duplicated keys
+    1. B is reduced to the first row of every code up front, along with the number of rows sharing that code
+    2. rows of A are looked up in the reduced B by hashing, so memory stays proportional to the size of A and B
+    :param codeA: integer code of every row in dataset A (e.g. codes from encode_keys)
+    :param codeB: integer code of every row in dataset B
+    :return: [position, count] -> position of the first matching row in B for every row of A (-1 if no match), and
+             the number of matching rows in B (0 if no match)
+    """
+    codeB = np.asarray(codeB)
+    group, uniques = pd.factorize(codeB)
+    first = first_index(group, len(uniques))
+    counts = np.bincount(group, minlength=len(uniques))
+
+    # code not found in B -> -1, which points to the last element appended below
+    loc = pd.Index(uniques).get_indexer(np.asarray(codeA))
+    position = np.append(first, -1)[loc]
+    count = np.append(counts, 0)[loc]
+    return [position, count]
+
+
+def match_codes(codeA, codeB):
+    """
+    pair up rows of dataset A and B sharing the same code (every match is kept, i.e. many-to-many)
+    1. rows of B are arranged by code (stable sort), every row of A then locates the range of its code by binary search
+    2. matches are listed row by row of A, and in original order of B within a row
+    :return: [count, matchB] -> number of matching rows in B for every row of A, and positions of the matching rows
+    """
+    codeA = np.asarray(codeA)
+    orderB = np.argsort(codeB, kind='stable')
+    sortedB = np.asarray(codeB)[orderB]
+    start = np.searchsorted(sortedB, codeA, side='left')
+    count = np.searchsorted(sortedB, codeA, side='right') - start
+    # position of every match in sorted B -> start of the range of its row in A, plus its offset in the output
+    offset = np.cumsum(count) - count
+    matchB = orderB[np.repeat(start - offset, count) + np.arange(count.sum())]
+    return [count, matchB]
+
+
+def match_partition(nameA, nameB, lenA, lenB, part, parts):
+    """
+    match one partition of the codes held in shared memory (runs in a worker process, see match_codes_parallel)
+    :return: [rows of A in this partition, count, matchB] (count and matchB as in match_codes, positions in B are
+             positions in the entire dataset)
+    """
+    memA = shared_memory.SharedMemory(name=nameA)
+    memB = shared_memory.SharedMemory(name=nameB)
+    try:
+        codeA = np.ndarray(lenA, dtype='int64', buffer=memA.buf)
+        codeB = np.ndarray(lenB, dtype='int64', buffer=memB.buf)
+        rowsA = np.flatnonzero(codeA % parts == part)
+        rowsB = np.flatnonzero(codeB % parts == part)
+        count, matchB = match_codes(codeA[rowsA], codeB[rowsB])
+        # arrays viewing shared memory must be released before it is closed
+        del codeA, codeB
+        return [rowsA, count, rowsB[matchB]]
+    finally:
+        memA.close()
+        memB.close()
+
+
+def match_codes_parallel(codeA, codeB, workers):
+    """
+    same as match_codes, the codes are split into partitions (code modulo number of workers) matched in a process pool
+    1. codes are placed in shared memory, so that every worker reads them without a copy being sent
+    2. rows sharing a code always fall into the same partition, hence partitions are matched independently
+    3. the number of matches of every row of A is known once all partitions return, matches are then scattered to
+       their place in the output, so that rows of A stay in original order
+    """
+    lenA, lenB = len(codeA), len(codeB)
+    memA = shared_memory.SharedMemory(create=True, size=max(lenA, 1) * 8)
+    memB = shared_memory.SharedMemory(create=True, size=max(lenB, 1) * 8)
+    try:
+        np.ndarray(lenA, dtype='int64', buffer=memA.buf)[:] = codeA
+        np.ndarray(lenB, dtype='int64', buffer=memB.buf)[:] = codeB
+        pool = process_pool(workers)
+        tasks = [pool.submit(match_partition, memA.name, memB.name, lenA, lenB, part, workers)
+                 for part in range(workers)]
+        parts = [task.result() for task in tasks]
+    finally:
+        for mem in [memA, memB]:
+            mem.close()
+            mem.unlink()
+
+    count = np.zeros(lenA, dtype='int64')
+    for rowsA, countPart, _ in parts:
+        count[rowsA] = countPart
+    offset = np.cumsum(count) - count
+    matchB = np.empty(count.sum(), dtype='int64')
+    for rowsA, countPart, matchPart in parts:
+        # output position of every match -> offset of its row in A, plus its order within the row
+        offsetPart = np.cumsum(countPart) - countPart
+        matchB[np.repeat(offset[rowsA] - offsetPart, countPart) + np.arange(len(matchPart))] = matchPart
+    return [count, matchB]
+
+
+# process pool shared by all joins, created upon first use (see process_pool)
+pool = {'executor': None, 'workers': 0}
+
+
+def process_pool(workers):
+    """
+    get the shared process pool, it is re-created only when a different number of workers is requested
+    note: processes are spawned rather than forked, as the main program runs threads (e.g. user interface)
+    """
+    if pool['executor'] is None or pool['workers'] != workers:
+        if pool['executor'] is not None:
+            pool['executor'].shutdown()
+        pool['executor'] = concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                                  mp_context=multiprocessing.get_context('spawn'))
+        pool['workers'] = workers
+    return pool['executor']
+
+
+def join_positions(codeA, codeB, how='left', workers=1):
+    """
+    join dataset A and B on integer codes, and return the row positions of every pair instead of the joined rows,
+    so that only the columns wanted are gathered afterwards
+    1. left -> every row of A in original order, each followed by all of its matches in original order of B
+       (same order as pandas merge with sort=False), a row without match appears once and is paired with -1
+    2. outer -> as left, followed by rows of B without match in original order (paired with -1)
+    3. matching runs in a process pool when more than one worker is given (see match_codes_parallel)
+    :return: [positions in A, positions in B], both are int64 arrays of the same length
+    """
+    codeA = np.asarray(codeA, dtype='int64')
+    codeB = np.asarray(codeB, dtype='int64')
+    if workers > 1:
+        count, matchB = match_codes_parallel(codeA, codeB, workers)
+    else:
+        count, matchB = match_codes(codeA, codeB)
+
+    # rows of A without match are kept once
+    rows = np.maximum(count, 1)
+    positionA = np.repeat(np.arange(len(codeA)), rows)
+    positionB = np.full(len(positionA), -1, dtype='int64')
+    positionB[np.repeat(count > 0, rows)] = matchB
+
+    if how == 'outer':
+        matched = np.zeros(len(codeB), dtype=bool)
+        matched[matchB] = True
+        onlyB = np.flatnonzero(~matched)
+        positionA = np.concatenate([positionA, np.full(len(onlyB), -1, dtype='int64')])
+        positionB = np.concatenate([positionB, onlyB])
+    return [positionA, positionB]
+
+
+def anti_join(codeA, codeB):
+    """
+    find rows of dataset A without any match in dataset B and vice versa, without building the matched rows
+    membership is tested on the integer codes by hashing, so memory stays proportional to the size of A and B
+    :param codeA: integer code of every row in dataset A (e.g. codes from encode_keys)
+    :param codeB: integer code of every row in dataset B
+    :return: [onlyA, onlyB] -> boolean arrays marking rows of A not in B, and rows of B not in A
+    """
+    codeA = pd.Series(codeA, copy=False)
+    codeB = pd.Series(codeB, copy=False)
+    onlyA = ~codeA.isin(codeB).to_numpy()
+    onlyB = ~codeB.isin(codeA).to_numpy()
+    return [onlyA, onlyB]
+
+
+def group_reduce(df, codes, method):
+    """
+    aggregate rows sharing the same code (e.g. codes from encode_keys)
+    1. keys are already unique -> aggregation is skipped, every row is a group by itself (the uniqueness check
+       takes a single linear scan when codes are in ascending order, e.g. input ordered by key)
+    2. otherwise -> rows are grouped on the integer codes with the built-in (Cython) reductions of pandas, except
+       'first', which takes the 1st non-missing row of every group by position (pandas falls back to a slow path
+       for category and nullable columns)
+    :param df: dataframe holding the columns to be aggregated
+    :param codes: integer code of every row
+    :param method: a dictionary {column name: reduction}, reduction is one of 'sum', 'min', 'first', 'count'
+                   (same semantics as pandas, i.e. missing values are skipped)
+    :return: [dataframe with one row per group, code of each group], groups are listed in order of first appearance
+    """
+    codes = np.asarray(codes)
+    # codes in ascending order are unique, which saves building a hash table for the uniqueness check
+    if not ((np.diff(codes) > 0).all() or pd.Index(codes).is_unique):
+        # group number of every row, groups are numbered in order of first appearance
+        group, groupCodes = pd.factorize(codes)
+        reduced = {c: how for c, how in method.items() if how != 'first'}
+        reduced = df[list(reduced)].groupby(group, sort=False).agg(reduced) if len(reduced) > 0 else None
+        result = dict()
+        for column, how in method.items():
+            if how != 'first':
+                result[column] = reduced[column].array
+                continue
+            values = df[column]
+            rows = np.flatnonzero(values.notna().to_numpy())
+            # position of the 1st non-missing row of every group (-1 if none)
+            first = first_index(group[rows], len(groupCodes))
+            first[first >= 0] = rows[first[first >= 0]]
+            result[column] = values.array.take(first, allow_fill=True)
+        return [pd.DataFrame(result), groupCodes]
+
+    # unique keys -> reductions over a single row
+    result = dict()
+    for column, how in method.items():
+        values = df[column]
+        if how == 'count':
+            result[column] = values.notna().astype('int64')
+        elif how == 'sum':
+            values = values.fillna(0) if values.hasnans else values
+            # a sum starts from 0 (as in pandas), so -0.0 is added to 0 and becomes 0.0
+            result[column] = values + 0.0 if values.dtype.kind == 'f' else values
+        elif how in ['min', 'first']:
+            result[column] = values
+        else:
+            raise ValueError('Unknown reduction "{}".'.format(how))
+    return [pd.DataFrame(result).reset_index(drop=True), codes]
+
+
+def join_text(groups, values, separator, n):
+    """
+    concatenate the distinct values of every group into one text, e.g. ['x', 'y', 'x'] -> 'x, y'
+    1. duplicated (group, value) pairs are dropped at once, the 1st occurrence is kept
+    2. values are joined group by group in a single pass, in order of first appearance within each group
+    :param groups: group number (0 to n-1) of every row, rows with a negative group number are ignored
+    :param values: value of every row, missing values are ignored
+    :param separator: text inserted between values
+    :param n: total number of groups
+    :return: an object array of n texts (empty text for a group without any value)
+    """
+    groups = np.asarray(groups, dtype='int64')
+    valueCode, uniques = pd.factorize(values)
+    # unique (group, value) pairs
+    pair = groups * len(uniques) + valueCode
+    keep = ~pd.Series(pair).duplicated().to_numpy() & (groups >= 0) & (valueCode >= 0)
+    g = groups[keep]
+    v = valueCode[keep]
+    # arrange values group by group (stable sort retains order of first appearance)
+    order = np.argsort(g, kind='stable')
+    bounds = np.searchsorted(g[order], np.arange(n + 1))
+    items = np.asarray(uniques, dtype=object).astype(str)[v[order]].tolist()
+    return np.array([separator.join(items[bounds[i]:bounds[i + 1]]) for i in range(n)], dtype=object)
+
@@ -1,9 +1,24 @@
 
-import numbers
-import tkinter
+import setting
 
 import numpy as np
-import tkinter.messagebox as messagebox         # messagebox method has to be separately import
+import pandas as pd
+
+# Arrow-backed string type, available only if the optional package pyarrow is installed
+try:
+    arrowString = pd.StringDtype('pyarrow')
+except ImportError:
+    arrowString = None
+
+
+def string_dtype():
+    """
+    :return: string type of key and text columns -> Arrow-backed if enabled in setting.storage and pyarrow is available,
+             otherwise Python string objects
+    """
+    if setting.storage['arrowString'] == 1 and arrowString is not None:
+        return arrowString
+    return pd.StringDtype('python')
 
 
 def bisect_list(data: list, side):
@@ -20,6 +35,22 @@ def bisect_list(data: list, side):
     return items
 
 
+def decode_column_selection(option):
+    """
+    convert combo box selections in user options into column ids, e.g. [2, 0, 1] -> [1, 0]
+    (combo box index 0 is a dummy item representing an unselected value)
+    :return: null - this function directly modify the option dictionary
+    """
+    # aggregation functions are chosen along with numeric columns, keep those of selected columns only
+    if 'optAggFunc' in option:
+        funcs = list(option['optAggFunc']) + ['sum'] * len(option.get('optAggNum', []))     # default to sum
+        option['optAggFunc'] = [f for f, v in zip(funcs, option.get('optAggNum', [])) if (v != 0)]
+    for key, value in option.items():
+        if isinstance(value, list) and key != 'optAggFunc':
+            # minus 1 on all combo box index since the first item is a dummy item
+            option[key] = [v-1 for v in value if (v != 0)]
+
+
 def get_unique_item(data: list, n):
     """
     # turn a list into a set and draw N items from it
@@ -64,56 +95,140 @@ def df_align_case(df, columns):
     all of them using the 1st value in that group, for instance, an 'apple' group will be transformed from
     ['apple', 'Apple', 'APPLE'] into ['apple', 'apple', 'apple'], the purpose of this function is to preserve the
     original letter case arrangement of certain data such as company name and address in which letter case affects
-    readability and carries meaning, on the flip side, it slows down the program and impact overall performance
+    readability and carries meaning
     :return: null - this function directly modify the linked dataframe
     """
+    dtype = string_dtype()
     for c in columns:
         # convert entire column to string type
-        df_case = df[[c]].astype('string')
-        # copy the whole column in lower case
-        df_case['low'] = df_case[c].str.lower()
-        # make flag 1 -> 1st element in distinct group = True
-        df_case['1st'] = ~df_case['low'].duplicated(keep='first')
-        # make flag 2 -> duplications = True
-        df_case['dup'] = df_case['low'].duplicated(keep=False)
-        # put 1st value of each distinct group into a dictionary,
-        # except those with duplication flag is False, since those values are already unique
-        first = df_case[['low', c]].loc[(df_case['1st']) & (df_case['dup'])]
-        first = dict(zip(first['low'].to_list(), first[c].to_list()))
-        # apply map function to every distinct group
-        df_case['after'] = df_case[c]
-        df_case.loc[df_case['dup'], 'after'] = df_case.loc[df_case['dup'], 'low'].map(first)
-        df[c] = df_case['after']
-
-
-def to_val(var, optWipeComma):
-    """
-    1. convert input variable into float number
-    2. this function retains a static variable (list) to keep count of unsuccessful conversion
-    :return: float number (if success) or NaN (if failed)
-    """
-    # initialize variable (False = success; True = failed)
-    boolFailure = False
-    # explicit number, no conversion
-    if isinstance(var, numbers.Number):
-        var2 = var
-    else:
-        non_number = var
-        # user option - treat comma (,) as thousand separator
-        if optWipeComma == 1:
-            non_number = str(non_number).replace(',', '')
-        # convert automatically with the float() function
-        # note: float() also removes whitespace and new line, therefore strip() is not required here
-        try:
-            var2 = float(non_number)
-        except ValueError:
-            # output NaN if the value is not convertible
-            var2 = np.NAN
-            # tag conversion as a failure; however if original value is an empty string, tag conversion as a success
-            boolFailure = True if str(var).strip() != '' else False
-    # write success/failure into the list
-    to_val.failStatus.append(boolFailure)
-    return var2
+        column = df[c].astype(dtype)
+        # assign a numeric code to every distinct value in lower case (missing value is coded as -1),
+        # codes are assigned in order of first appearance
+        codes = pd.factorize(column.str.lower())[0]
+        # locate the 1st element of every distinct group -> the position where a code larger than all previous codes appears
+        prevMax = np.maximum.accumulate(np.insert(codes, 0, -1))[:-1]
+        first = np.flatnonzero(codes > prevMax)
+        # gather the 1st value of every distinct group back to all rows (position -1 -> missing value)
+        position = first[codes]
+        position[codes < 0] = -1
+        df[c] = column.array.take(position, allow_fill=True)
+
+
+def key_normalizer(option):
+    """
+    compile user options on key columns (ignore case, trim, trim leading zero, partial match) into one function
+    1. all enabled transformations are fused and applied to a value in a single pass (Python strings), or applied
+       to all values at once with Arrow compute functions (Arrow-backed strings, see string_dtype)
+    2. every distinct value is transformed only once, the outcome is broadcast back to all rows holding that value
+    :return: a function that takes a column and returns its normalized copy (string type, missing value stays missing)
+    """
+    steps = []      # every step is a pair of functions -> (applied to a value, applied to a string column)
+    if option.get('optIgnoreCase') == 1:
+        steps.append((str.lower, lambda s: s.str.lower()))
+    if option.get('optTrim') == 1:
+        steps.append((str.strip, lambda s: s.str.strip()))
+    if option.get('optTrimZero') == 1:
+        steps.append((lambda x: x.lstrip('0'), lambda s: s.str.lstrip('0')))
+    if option.get('optPartialMatch', np.NAN) >= 1:
+        length = option['optPartialMatch']
+        steps.append((lambda x: x[0: length], lambda s: s.str.slice(0, length)))
+
+    def transform(value):
+        for step, _ in steps:
+            value = step(value)
+        return value
+
+    def normalize(column):
+        dtype = string_dtype()
+        # assign a numeric code to every distinct value (missing value is coded as -1)
+        codes, uniques = pd.factorize(column.array if isinstance(column.dtype, pd.StringDtype) else column.to_numpy())
+        # transform distinct values only
+        text = pd.Series(uniques).astype(dtype)
+        if len(steps) > 0 and dtype.storage == 'pyarrow':
+            for _, step in steps:
+                text = step(text)
+        elif len(steps) > 0:
+            text = pd.Series(pd.array([transform(v) for v in text.to_numpy(dtype=object)], dtype=dtype))
+        # broadcast back to all rows
+        values = text.array.take(codes, allow_fill=True)
+        return pd.Series(values, index=column.index)
+
+    return normalize
+
+
+def to_val(column, optWipeComma):
+    """
+    1. convert an entire column into float numbers with whole-column operations
+    2. conversion failure is reported for every row, failure is not counted if original value is empty or missing
+    :return: [converted column (NaN if failed), failure status of every row (success=False; failure=True)]
+    """
+    # explicit numbers, no conversion
+    if pd.api.types.is_numeric_dtype(column):
+        return [column.astype('float'), np.zeros(len(column), dtype=bool)]
+    # convert every value into text
+    text = column.astype(str)
+    # user option - treat comma (,) as thousand separator
+    if optWipeComma == 1:
+        text = text.str.replace(',', '', regex=False)
+    text = text.str.strip()
+    # find numbers in one pass, values are then taken from Python's parser (same as float()), as to_numeric does not
+    # always round to the nearest float, e.g. '92926.81386644141' -> 92926.8138664414
+    try:
+        value = text.astype('float')                # every value is a number (common case)
+    except ValueError:
+        number = pd.to_numeric(text, errors='coerce').notna()
+        value = pd.Series(np.nan, index=text.index)
+        value[number] = text[number].astype('float')
+    # tag conversion as a failure; however if original value is missing or an empty string, tag it as a success
+    failure = value.isna() & column.notna() & (text != '')
+    # retry with the float() function for the remaining values, as float() accepts a wider range of syntax
+    # (e.g. 'nan', '1_000'), only a small number of values normally fall into this path
+    if failure.any():
+        retry = text[failure].map(to_float)
+        value[failure] = retry
+        failure[failure] = retry.isna() & ~text[failure].str.lower().str.lstrip('+-').isin(['nan'])
+    return [value, failure.to_numpy(dtype=bool)]
+
+
+def compact_column(column, categoryRatio):
+    """
+    store a column of raw values (text as read from clipboard) in the most compact type that keeps its displayed value
+    1. numbers -> integer (nullable) or float, only if every value is written exactly the way the number is printed,
+       e.g. '01', '1.50' and '1,000' stay as text, so that the value in the result is never altered
+    2. text with few distinct values -> category
+    3. other text -> Arrow-backed string if enabled (see string_dtype), otherwise raw text is kept
+    :param categoryRatio: maximum number of distinct values (as a fraction of rows) of a category column
+    :return: a column in compact type (missing value stays missing)
+    """
+    # assign a numeric code to every distinct value (missing value is coded as -1), inspect distinct values only
+    codes, uniques = pd.factorize(column.to_numpy())
+    if len(uniques) == 0:
+        return column
+    text = pd.Series(uniques, dtype=object).astype(str)
+    try:
+        number = pd.to_numeric(text)                # stops at the 1st value that is not a number
+    except (ValueError, TypeError):
+        number = pd.Series([np.nan])
+    if number.notna().all() and (number.astype(str) == text).all():
+        if number.dtype.kind == 'i':
+            values = pd.array(number.to_numpy(), dtype='Int64').take(codes, allow_fill=True)
+            return pd.Series(values, index=column.index, name=column.name)
+        elif number.dtype.kind == 'f':
+            values = np.append(number.to_numpy(), np.nan)[codes]       # code -1 picks the appended NaN
+            return pd.Series(values, index=column.index, name=column.name)
+    if len(uniques) <= len(column) * categoryRatio:
+        return pd.Series(pd.Categorical.from_codes(codes, uniques), index=column.index, name=column.name)
+    if string_dtype().storage == 'pyarrow':
+        values = pd.array(text.to_numpy(), dtype=arrowString).take(codes, allow_fill=True)
+        return pd.Series(values, index=column.index, name=column.name)
+    return column
+
+
+def to_float(var):
+    try:
+        return float(var)
+    except ValueError:
+        return np.NAN
 
 
 # ------------------------------------------------------ #
@@ -121,6 +236,9 @@ def to_val(var, optWipeComma):
 # ------------------------------------------------------ #
 
 def alert(e: Exception):
+    # tkinter is imported on demand, so that data functions in this module remain usable without a GUI
+    import tkinter.messagebox as messagebox     # messagebox method has to be separately import
+
     message = str(e.args[0])
     # second argument determines message style, if argument not provided, default is an error message
     severity = str(e.args[1]) if (len(e.args) >= 2) else 'e'
@@ -132,7 +250,14 @@ def alert(e: Exception):
         return messagebox.showwarning('Please Retry', message)
 
 
-def centered_window(root: tkinter.Tk, width, height):
+def confirm(message, title='Please Confirm'):
+    # ask user a yes / no question, return True if user answered yes
+    import tkinter.messagebox as messagebox
+
+    return messagebox.askyesno(title, message)
+
+
+def centered_window(root, width, height):
     # calculate x, y coordinates of the centered position
     x = int((root.winfo_screenwidth()/2) - (width/2))
     y = int((root.winfo_screenheight()/2) - (height/2))
@@ -185,3 +310,29 @@ def format_by_significance(number):
     else:
         rounded = None
     return rounded
+
+
+def format_percent(column, na='N/A'):
+    """
+    format an entire column of ratios as percentage text with 2 decimal places, e.g. 0.12345 -> '12.35%', the output
+    is identical to '{:,.2%}'.format() applied to every value
+    1. common values (below 1,000%) are assembled from lookup tables of pre-formatted integer and decimal parts
+    2. the remaining values (large, infinite or too close to a rounding tie) are formatted one by one
+    :return: an object array of text, missing value is replaced by na
+    """
+    value = np.asarray(column, dtype='float64')
+    # lookup tables: integer part (0 to 999, negative numbers at the 2nd half) and decimal part (.00% to .99%)
+    intPart = np.array([str(i) for i in range(1000)] + ['-' + str(i) for i in range(1000)], dtype=object)
+    decPart = np.array(['.{:02d}%'.format(i) for i in range(100)], dtype=object)
+    with np.errstate(invalid='ignore'):
+        # percentage in hundredths, e.g. 0.12345 -> 1234.5 -> 1235
+        scaled = value * 100 * 100
+        hundredths = np.rint(scaled)
+        tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) <= 1e-6
+        fast = (np.abs(hundredths) < 100000) & ~tie
+    text = np.full(len(value), na, dtype=object)
+    n = np.abs(hundredths[fast]).astype('int64')
+    text[fast] = intPart[n // 100 + 1000 * np.signbit(value[fast])] + decPart[n % 100]
+    slow = ~fast & ~np.isnan(value)
+    text[slow] = ['{:,.2%}'.format(v) for v in value[slow].tolist()]
+    return text
@@ -49,10 +49,9 @@ class Viewer(ttk.Treeview):
 
     def tree_refresh(self):
         # extract a portion of imported data
-        self.Subset = self.DataSource.df.head(self.constHeight + 1).copy()      # +1 to include header row
+        self.Subset = self.DataSource.df.head(self.constHeight).astype(object)    # typed columns -> plain values
         self.Subset = self.Subset.fillna('.')
-        self.SubsetColNames = self.Subset.iloc[0]                               # get header
-        self.Subset = self.Subset.iloc[1:]                                      # keep only data rows
+        self.SubsetColNames = pd.Series(self.DataSource.header, dtype=object).fillna('.')   # get header
 
         self.tree_clear()
         self.tree_fill_heading()
@@ -233,6 +232,53 @@ class PopUp(tk.Toplevel):
         ttk.Button(self, text='OK', command=self.destroy).grid(row=1, column=1, padx=20, pady=20)
 
 
+class ProgressForm(tk.Toplevel):
+    """
+    1. this modal form shows the progress of an operation running in a background job
+    2. user could stop the operation by pressing the Cancel button (or closing the form)
+    3. the form is refreshed and dismissed by the parent form, which polls the background job
+    """
+    def __init__(self, parent, title, job):
+        tk.Toplevel.__init__(self, parent)
+        # call modal form
+        self.root = parent
+        self.transient(parent)
+        self.grab_set()
+
+        # set attribute of modal form
+        self.geometry('+{0}+{1}'.format(parent.winfo_rootx() + 300, parent.winfo_rooty() + 250))
+        self.title(title)
+        self.resizable(0, 0)
+        self.protocol('WM_DELETE_WINDOW', self.cancel)
+
+        # initialize objects and variables
+        self.job = job
+        self.stage = tk.StringVar()
+        self.stage.set('Starting...')
+
+        # arrange visual components
+        self.icon = sty.Drawing(self)
+        self.icon.draw_loading_screen()
+        self.icon.grid(row=0, column=0, padx=20, pady=(20, 0))
+        ttk.Label(self, textvariable=self.stage, anchor='w', width=50).grid(row=1, column=0, padx=20, pady=(10, 0))
+        self.bar = ttk.Progressbar(self, orient='horizontal', mode='determinate', length=337, maximum=100)
+        self.bar.grid(row=2, column=0, padx=20, pady=10)
+        self.button = ttk.Button(self, text='Cancel', command=self.cancel)
+        self.button.grid(row=3, column=0, padx=20, pady=(0, 20))
+
+    def refresh(self):
+        if self.job.cancelEvent.is_set():
+            self.stage.set('Cancelling... (waiting for the current stage to finish)')
+        elif self.job.stage:
+            self.stage.set(self.job.stage + '...')
+        self.bar['value'] = round(self.job.progress * 100)
+
+    def cancel(self):
+        self.job.cancel()
+        self.button.configure(state='disabled')
+        self.refresh()
+
+
 class ModalForm(tk.Toplevel):
     """
     1. this class prompt a modal form to gather user options on an operation
@@ -262,6 +308,7 @@ class ModalForm(tk.Toplevel):
         self.colListA = []
         self.colListB = []
         self.user_controls = []                         # a list to hold user controls created for each user option
+        self.aggFuncBoxes = []                          # combo boxes of aggregation functions (next to optAggNum)
         self.param = param                              # updatable
 
         # populate the modal form interface
@@ -274,8 +321,8 @@ class ModalForm(tk.Toplevel):
         self.geometry('{0}x{1}+{2}+{3}'.format(550 + addW, 550 + addH, self.left_x + 300 + addX, self.top_y + addY))
 
     def read_col_name(self):
-        self.colListA = ([''] + self.DataSourceA.df.iloc[0, :].tolist()) if len(self.DataSourceA.df) > 0 else []
-        self.colListB = ([''] + self.DataSourceB.df.iloc[0, :].tolist()) if len(self.DataSourceB.df) > 0 else []
+        self.colListA = ([''] + self.DataSourceA.header) if len(self.DataSourceA.df) > 0 else []
+        self.colListB = ([''] + self.DataSourceB.header) if len(self.DataSourceB.df) > 0 else []
 
     def create_user_controls(self):
         # append dataset id (0 = Dataset A, 1 = Dataset B) into list if dataset is non-empty
@@ -304,8 +351,8 @@ class ModalForm(tk.Toplevel):
                 # set layout of the combobox
                 args = {
                     'optJoinColumns':   {'width': 270, 'scroll': 0, 'layout': 'parallel', 'addH':  90},
-                    'optDeltaColumns':  {'width': 135, 'scroll': 2, 'layout': 'parallel', 'addH': 150},
-                    'optAggNum':        {'width': 135, 'scroll': 0, 'layout': 'overlay',  'addH': 180},
+                    'optDeltaColumns':  {'width': 135, 'scroll': 2, 'layout': 'parallel', 'addH': 185},
+                    'optAggNum':        {'width': 270, 'scroll': 0, 'layout': 'overlay',  'addH': 180},
                     'optAggText':       {'width': 135, 'scroll': 0, 'layout': 'overlay',  'addH': 180}
                 }
                 # create frame
@@ -328,8 +375,20 @@ class ModalForm(tk.Toplevel):
                         obj.var = var                                   # bind "var" to any object to prevent unset by garbage collection
                         obj.grid(row=j, column=pos, sticky='w', padx=10, pady=5)
                         holder.append(obj)                              # put all created combobox into a list
+                        # aggregation function of each numeric column is chosen next to it (see optAggFunc)
+                        if option == 'optAggNum':
+                            funcVar = tk.StringVar()
+                            funcObj = ttk.Combobox(container.innerFrame, textvariable=funcVar, state='readonly',
+                                                   values=list(setting.aggFuncList.values()), width=13)
+                            funcObj.var = funcVar
+                            funcObj.current(list(setting.aggFuncList.keys()).index(self.option['optAggFunc'][j]))
+                            funcObj.grid(row=j, column=pos + 1, sticky='w', padx=(0, 10), pady=5)
+                            self.aggFuncBoxes.append(funcObj)
                 obj = holder
                 self.geometry_adjust(addH=args[option]['addH'])         # extend window height to accommodate all boxes
+            elif option in ['optAggFunc']:
+                # combo boxes were created along with those of optAggNum
+                obj = self.aggFuncBoxes
             elif option in ['optSeparator']:
                 # create frame
                 frame = ttk.Frame(self)
@@ -413,6 +472,8 @@ class ModalForm(tk.Toplevel):
                 # retrieve a list if user control is a collection of combobox
                 if isinstance(obj, list):
                     value = [combo.current() for combo in obj]
+            elif key in ['optAggFunc']:
+                value = [list(setting.aggFuncList.keys())[combo.current()] for combo in obj]
             else:
                 value = obj.var.get()
             newOption[key] = value
@@ -424,10 +485,7 @@ class ModalForm(tk.Toplevel):
             raise Exception(warnings[0], 'w')
         else:
             # ... succeed -> proceed
-            for key, value in newOption.items():
-                if isinstance(value, list):
-                    # minus 1 on all combo box index since the first item is a dummy item
-                    newOption[key] = [v-1 for v in value if (v != 0)]
+            func.decode_column_selection(newOption)
             # pass a variable indicating that ok button had been pressed
             self.param['commit'] = 1
             # return user inputs through dictionary update method
@@ -450,7 +508,7 @@ class SettingForm(tk.Toplevel):
         # set modal form attribute
         self.left_x = parent.winfo_rootx()
         self.top_y = parent.winfo_rooty()
-        self.geometry('{0}x{1}+{2}+{3}'.format(450, 250, self.left_x+250, self.top_y+150))
+        self.geometry('{0}x{1}+{2}+{3}'.format(450, 370, self.left_x+250, self.top_y+150))
         self.title('Settings')
         self.resizable(0, 0)
 
@@ -479,7 +537,9 @@ class SettingForm(tk.Toplevel):
                  'current': s['maxKeyCol'], 'lowBound': s['maxKeyColInit'], 'upBound': s['maxKeyColInit'] + 10, 'step': 1}
         lim4 = {'key': 'maxNumCol', 'desc': 'Maximum number of numeric columns',
                  'current': s['maxNumCol'], 'lowBound': s['maxNumColInit'], 'upBound': s['maxNumColInit'] + 10, 'step': 1}
-        limits = [lim1, lim2, lim3, lim4]
+        lim5 = {'key': 'maxJoinRow', 'desc': 'Maximum number of rows of join result',
+                 'current': s['maxJoinRow'], 'lowBound': s['maxJoinRowInit'], 'upBound': s['maxJoinRowInit'] * 10, 'step': 1000000}
+        limits = [lim1, lim2, lim3, lim4, lim5]
 
         # create spinbox
         for i, lim in enumerate(limits):
@@ -492,13 +552,31 @@ class SettingForm(tk.Toplevel):
 
             self.user_controls[lim['key']] = obj
 
+        # create checkbox and spinbox of the prefilter of join keys (false-positive rate is shown in percent)
+        row = len(limits) * 2
+        var = tk.IntVar()
+        var.set(setting.prefilter['enabled'])
+        self.prefilter = ttk.Checkbutton(frame, text='Prefilter keys of large datasets (Bloom filter)', variable=var,
+                                         onvalue=1, offvalue=0)
+        self.prefilter.var = var
+        self.prefilter.grid(row=row, column=0, columnspan=2, sticky='w', padx=10)
+        var = tk.StringVar()
+        var.set('{:g}'.format(setting.prefilter['falsePositiveRate'] * 100))
+        ttk.Label(frame, text='False-positive rate of prefilter (%)').grid(row=row+2, column=0, sticky='w', padx=10)
+        self.falsePositiveRate = ttk.Spinbox(frame, textvariable=var, values=('0.1', '0.5', '1', '2', '5', '10'),
+                                             state='readonly', width=10, justify='right')
+        self.falsePositiveRate.var = var
+        self.falsePositiveRate.grid(row=row+2, column=1, sticky='e', padx=10, pady=10)
+
         # create OK button
-        ttk.Button(self, text='Confirm', command=self.close_form).place(relx=0.50, rely=0.85, anchor='center')
+        ttk.Button(self, text='Confirm', command=self.close_form).place(relx=0.50, rely=0.90, anchor='center')
 
     def close_form(self):
         self.param['commit'] = 1
         for key, obj in self.user_controls.items():
             self.param['limit'].update({key: obj.var.get()})
+        self.param['prefilter'].update({'enabled': self.prefilter.var.get(),
+                                        'falsePositiveRate': float(self.falsePositiveRate.var.get()) / 100})
         self.destroy()
 
 
@@ -0,0 +1,163 @@
+
+# ------------------------------------------------------ #
+# Stage Instrumentation
+# ------------------------------------------------------ #
+
+import setting
+
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import time
+import tracemalloc
+
+
+class Stage:
+    """
+    measure one processing stage, used as a context manager:
+        with recorder.stage('merge', rowsIn=len(df)) as s:
+            ...
+            s.rowsOut = len(result)
+    """
+    def __init__(self, recorder, name, rowsIn):
+        self.recorder = recorder
+        self.name = name
+        self.rowsIn = rowsIn
+        self.rowsOut = None
+        self.start = 0.0
+        self.memStart = 0
+
+    def __enter__(self):
+        if self.recorder.traceMemory:
+            self.memStart = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, 'reset_peak'):      # available since Python 3.9
+                tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.start
+        memDelta = memPeak = None
+        if self.recorder.traceMemory:
+            current, peak = tracemalloc.get_traced_memory()
+            memDelta = current - self.memStart
+            memPeak = (peak - self.memStart) if hasattr(tracemalloc, 'reset_peak') else None
+        self.recorder.add(self.name, elapsed, self.rowsIn, self.rowsOut, memDelta, memPeak)
+        return False
+
+
+class NullStage:
+    """
+    placeholder returned when instrumentation is disabled, it does nothing
+    """
+    rowsOut = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class Recorder:
+    """
+    collect timing, row counts and memory delta of every processing stage within a run
+    1. a run starts with begin() and ends with end(), which prints a breakdown to Message Window and appends it
+       to a rotating JSON log file
+    2. a stage entered more than once within a run (e.g. once per column) is accumulated into one entry
+    3. when disabled (see setting.instrument), stage() returns a shared placeholder and nothing is recorded
+    """
+    nullStage = NullStage()
+
+    def __init__(self):
+        self.enabled = False
+        self.traceMemory = False
+        self.run = ''
+        self.stages = dict()
+        self.logger = None
+
+    def begin(self, run):
+        self.enabled = setting.instrument['enabled'] == 1
+        self.traceMemory = self.enabled and setting.instrument['traceMemory'] == 1
+        self.run = run
+        self.stages = dict()
+        if self.traceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name, rowsIn=None):
+        if not self.enabled:
+            return self.nullStage
+        return Stage(self, name, rowsIn)
+
+    def add(self, name, elapsed, rowsIn, rowsOut, memDelta, memPeak):
+        if name not in self.stages:
+            self.stages[name] = {'stage': name, 'seconds': 0.0, 'calls': 0, 'rowsIn': None, 'rowsOut': None,
+                                 'memDeltaMB': None, 'memPeakMB': None}
+        s = self.stages[name]
+        s['seconds'] += elapsed
+        s['calls'] += 1
+        s['rowsIn'] = rowsIn if s['rowsIn'] is None else s['rowsIn']
+        s['rowsOut'] = rowsOut if rowsOut is not None else s['rowsOut']
+        if memDelta is not None:
+            s['memDeltaMB'] = (s['memDeltaMB'] or 0.0) + memDelta / 1048576
+        if memPeak is not None:
+            s['memPeakMB'] = max(s['memPeakMB'] or 0.0, memPeak / 1048576)
+
+    def end(self, log=None):
+        """
+        :param log: Message Window (or any object with an add() method) to print the breakdown on
+        :return: a list of stage records
+        """
+        if not self.enabled:
+            return []
+        if self.traceMemory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        records = list(self.stages.values())
+        for r in records:
+            r['seconds'] = round(r['seconds'], 4)
+            for k in ['memDeltaMB', 'memPeakMB']:
+                r[k] = None if r[k] is None else round(r[k], 2)
+        if log is not None:
+            for line in self.breakdown(records):
+                log.add(line)
+        self.save(records)
+        self.enabled = False
+        return records
+
+    def breakdown(self, records):
+        total = sum([r['seconds'] for r in records])
+        lines = ['⏱ {0} - {1:.3f}s in total'.format(self.run, total)]
+        for r in records:
+            rows = ''
+            if r['rowsIn'] is not None or r['rowsOut'] is not None:
+                rows = '  rows {0}→{1}'.format(*['-' if n is None else '{:,}'.format(n) for n in [r['rowsIn'], r['rowsOut']]])
+            mem = '' if r['memDeltaMB'] is None else '  mem {:+,.1f}MB'.format(r['memDeltaMB'])
+            lines.append('   {0}: {1:.3f}s ({2:.0%}){3}{4}'.format(
+                r['stage'], r['seconds'], r['seconds'] / total if total > 0 else 0, rows, mem))
+        return lines
+
+    def save(self, records):
+        try:
+            if self.logger is None:
+                path = setting.instrument['logFile']
+                if os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(path, encoding='utf-8',
+                                                               maxBytes=setting.instrument['maxBytes'],
+                                                               backupCount=setting.instrument['backupCount'])
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                self.logger = logging.getLogger('stage_timing')
+                self.logger.propagate = False
+                self.logger.setLevel(logging.INFO)
+                self.logger.addHandler(handler)
+            self.logger.info(json.dumps({'time': datetime.datetime.now().isoformat(timespec='seconds'),
+                                         'run': self.run, 'stages': records}, ensure_ascii=False))
+        except OSError:
+            # failure to write log file must not interrupt the program
+            pass
+
+
+# shared recorder for the entire program
+recorder = Recorder()
@@ -0,0 +1,379 @@
+
+# ------------------------------------------------------ #
+# Profiling Form
+# ------------------------------------------------------ #
+
+import mod_function as func
+import mod_style as sty
+
+import pandas as pd
+import tkinter as tk
+import tkinter.ttk as ttk
+
+
+class ProfilingForm(tk.Toplevel):
+
+    # define visual element dimension
+    chtWidth = 475
+    chtHeight = 155
+    thWidth = 210
+    tdWidth = 100
+
+    def __init__(self, parent, DataSource, option):
+        tk.Toplevel.__init__(self, parent)
+
+        # create modal form
+        self.root = parent
+        self.transient(parent)
+        self.grab_set()
+
+        # set modal form attribute
+        self.left_x = parent.winfo_rootx()
+        self.top_y = parent.winfo_rooty()
+        self.geometry("{0}x{1}+{2}+{3}".format((65 + self.thWidth + self.chtWidth), 600, self.left_x + 100, self.top_y))
+        self.title('Result')
+        self.resizable(0, 0)
+
+        # set variable reference
+        self.option = option
+        self.DataSource = DataSource
+
+        # initialize a frame to accommodate all created visual objects
+        self.inner_frame = tk.Frame()
+
+        # show modal form
+        self.make_window_scrollbar()
+        self.cascade()
+
+    def cascade(self):
+        # insert caption
+        self.canvas_top_caption = sty.Drawing(self.inner_frame)
+        self.canvas_top_caption.draw_profiling_caption('Profiling Summary')
+        self.canvas_top_caption.grid(row=0, column=0, columnspan=9, sticky='wn', padx=(10, 0), pady=(5, 20))
+
+        # generate individual summary for all data fields
+        for cid, c in enumerate(self.DataSource.df.columns):
+            self.insert_stats(cid, c)
+
+    def insert_stats(self, cid, c, oldStats=None, ctype=None):
+        """
+        :param oldStats: if specified, replace the already generated summary with a new one
+        :param ctype: if specified, default column type is override by this value
+        """
+        df = self.DataSource.df
+
+        # create new individual summary
+        stats = DataFieldStats(self.inner_frame, self.option, df, cid, c, top=self, ctype=ctype)
+        stats.grid(row=cid + 1, column=0)
+
+        # destroy old summary (if exists) after new summary has been created
+        if oldStats:
+            oldStats.destroy()
+
+    def make_window_scrollbar(self):
+        # create the base frame
+        super_frame = tk.Frame(self)
+        super_frame.pack(fill='both', expand=1)
+
+        # create Canvas on the base frame
+        super_canvas = tk.Canvas(super_frame, bg='white', highlightthickness=0)
+        super_canvas.pack(side='left', expand=1, fill='both')
+
+        # attach scrollbar to Canvas
+        form_scrollbar = ttk.Scrollbar(super_frame, orient='vertical', command=super_canvas.yview)
+        form_scrollbar.pack(side='right', fill='y')
+
+        # configure Canvas
+        super_canvas.configure(yscrollcommand=form_scrollbar.set)
+        super_canvas.bind("<Configure>", lambda e: super_canvas.configure(scrollregion=super_canvas.bbox("all")))
+
+        # create an inner frame on Canvas
+        inner_frame = tk.Frame(super_canvas, bg='white')
+
+        # place inner frame inside Canvas window object
+        super_canvas.create_window((0, 0), window=inner_frame, anchor="nw")
+
+        # set reference to inner frame
+        self.inner_frame = inner_frame
+
+
+class DataFieldStats(tk.Frame):
+
+    # get visual element dimension
+    chtWidth = ProfilingForm.chtWidth
+    chtHeight = ProfilingForm.chtHeight
+    thWidth = ProfilingForm.thWidth
+    tdWidth = ProfilingForm.tdWidth
+
+    # set common style
+    tdColor = '#F7F7F7'
+    fillColor = ['#39E5FF', '#6FECFF', '#9BF2FF', '#C2F7FF', '#E9FCFF', '#D0EDF1']
+    lineColor = '#69D6FF'
+    bold = ('Arial', 9, 'bold')
+
+    def __init__(self, parent, option, df, cid, c, top, ctype=''):
+        tk.Frame.__init__(self, parent)
+        self.parent = parent
+        self.df = df
+        self.option = option
+        self.c = c                              # column name
+        self.cid = cid                          # column position
+        self.top = top                          # parent modal form
+        self.colTypeIn = ctype                  # column type specified by user that overrides aut-detected column type
+
+        # initialize output variables
+        self.df1 = pd.DataFrame()
+        self.colType = ''                       # column type (auto-detected)
+        self.fieldName = ''                     # column header
+        self.nRecord = 0
+        self.nMissing = 0
+        self.value_counts = pd.Series(dtype='object')
+
+        # miscellaneous
+        self['bg'] = 'white'
+        # workaround: in order to set tk.Label size in pixel, a blank image must be embedded in tk.label
+        self.img = tk.PhotoImage()
+
+        # transform data in column
+        self.transform_column(c)
+
+        # visualize data in column
+        # --------------------------------------------------------------------------
+        # left side - mean, missing value, etc.
+        # --------------------------------------------------------------------------
+        self.create_basic_stats(self.df1, c, self.cid, self.colType, self.fieldName,
+                                self.value_counts, self.nMissing, self.nRecord)
+        # --------------------------------------------------------------------------
+        # right side - histogram, top 5, pie chart
+        # --------------------------------------------------------------------------
+        if self.colType == 'numeric':
+            self.create_histogram(self.df1, c, self.cid, self.colType,
+                                  self.value_counts, self.nMissing, self.nRecord)
+        elif self.colType == 'text':
+            self.create_pie_chart(self.df1, c, self.cid, self.colType,
+                                  self.value_counts, self.nMissing, self.nRecord)
+
+    def transform_column(self, c):
+        # copy entire column into a new dataframe
+        df1 = pd.DataFrame()
+        # (typed columns are turned into plain values, so that they are treated the same as text read from clipboard)
+        df1[c] = self.df[c].astype(object).where(self.df[c].notna())
+
+        # get column header
+        self.fieldName = str(self.top.DataSource.header[self.cid])[:50]  # trim name length
+
+        # strip whitespaces if this user option is on
+        if 'optIgnorePadding' in self.option:
+            df1[c] = df1[c].apply(lambda x: x.strip() if isinstance(x, str) else x)
+
+        # replace empty string with NaN
+        df1 = df1.mask(df1 == '')
+        # convert column type to numeric, however this only works if the column does not contain any string value
+        df1 = df1.astype('float', errors='ignore')
+        df1 = df1.convert_dtypes(convert_integer=True, convert_floating=True)
+
+        # determine column type (numeric or text)
+        if 'num' in str(self.colTypeIn).lower():                                # user specified numeric
+            typ = 0
+        elif 'text' in str(self.colTypeIn).lower():                             # user specified text
+            typ = 1
+        elif any([s in str(df1.dtypes[c]).lower() for s in ['int', 'float']]):  # auto-detected numeric
+            typ = 0
+        else:
+            typ = 1                                                             # auto-detected text
+        self.colType = ['numeric', 'text'][typ]
+
+        # prepare the data according to column type
+        if typ == 0:
+            # force convert all value into number
+            df1[c] = pd.to_numeric(df1[c], errors='coerce')
+        else:
+            # text is held in the string type set in setting (e.g. Arrow-backed strings for faster value_counts)
+            if isinstance(df1[c].dtype, pd.StringDtype):
+                df1[c] = df1[c].astype(func.string_dtype())
+            # align letter case if case-insensitive option is on
+            if self.option['optIgnoreCase'] == 1:
+                func.df_align_case(df1, [c])
+
+        # compute basic statistic
+        self.nMissing = df1[c].isna().sum()                 # total N/A count
+        self.nRecord = len(df1[c])                          # total record count
+        self.value_counts = df1[c].value_counts()           # total distinct count (N/A excluded)
+
+        self.df1 = df1
+
+    def create_basic_stats(self, df1, colName, cid, colType, fieldName, value_counts, nMissing, nRecord):
+        cells = dict()
+
+        # create a frame to enclose data table
+        frame = tk.Frame(self, background=self.tdColor)
+        frame.grid(row=0, column=0, padx=10, pady=(0, 10), sticky='nw')
+
+        # place data table caption
+        tk.Label(frame, text=fieldName, bg='#009EFF', fg='white', image=self.img, compound='c',
+                 font=self.bold, anchor='nw', width=self.thWidth, wraplength=self.thWidth - 10,
+                 ).grid(row=0, column=0, columnspan=2, sticky='nw')
+
+        # compute basic statistic
+        # ... compute Mean and Median (for numeric column)
+        if colType == 'numeric':
+            cells['mean'] = ['Mean', str(func.format_by_significance(df1[colName].dropna().mean()))[:17], 'black']
+            cells['median'] = ['Median', str(func.format_by_significance(df1[colName].dropna().median()))[:17], 'black']
+        # ... compute Distinct Value frequency (for text column)
+        elif colType == 'text':
+            cells['distinct'] = ['Distinct Value', len(value_counts), 'black']
+        # ... compute Missing Value frequency
+        na_pct = (nMissing / nRecord) if nRecord != 0 else 0
+        na_text = f"{na_pct:.0%}" + (f" ({nMissing})" if nMissing > 0 else "")
+        na_color = 'red' if (nMissing > 0) else 'black'
+        cells['Missing Value'] = ['Missing Value', na_text, na_color]
+
+        # insert basic stats into data table
+        cellstyle = {'width': self.tdWidth, 'bg': self.tdColor, 'image': self.img, 'compound': 'c', 'anchor': 'w'}
+        for j, cell in enumerate(cells.values()):
+            tk.Label(frame, **cellstyle,
+                     text=cell[0], font=self.bold
+                     ).grid(row=j+1, column=0, sticky='w')
+            tk.Label(frame, **cellstyle,
+                     text=cell[1], fg=cell[2]
+                     ).grid(row=j+1, column=1, sticky='w')
+        pos = j+2
+
+        # create a toggle button to let user reload statistic in another data type
+        # it calls a function from parent form that will destroy and re-create the current block of visualization
+        # ... load background image for the button
+        self.gallery = sty.Gallery()
+        bg = self.gallery.get('button_xp')
+        # ... toggle between alternative data type
+        ctype = 'numeric' if (colType == 'text') else 'text'
+        tk.Button(frame, text='To ' + ctype,
+                  borderwidth=0, image=bg, compound='c',
+                  background=self.tdColor, activebackground=self.tdColor,           # prevent color change upon click
+                  command=lambda: self.top.insert_stats(cid, colName, self, ctype)
+                  ).grid(row=pos, column=0, sticky='w', padx=2, pady=5)
+
+    def create_histogram(self, df1, colName, cid, colType, value_counts, nMissing, nRecord):
+        # histogram size
+        topMargin = 15
+        leftMargin = 50
+        columnWidth = 40
+        columnHeight = 100
+
+        # create Canvas
+        can = tk.Canvas(self, width=self.chtWidth, height=self.chtHeight, bg='white', highlightthickness=0)
+        can.grid(row=0, column=1, pady=(0, 15))
+
+        # histogram parameter
+        cut = 10
+        bins = []
+        binLabels = []
+
+        # calculate max, min
+        upper = df1[colName].dropna().max()                 # drop NaN (could be resulted from pd.to_numeric)
+        lower = df1[colName].dropna().min()
+        # skip if max and min is missing
+        if not {'<NA>', 'nan'}.intersection([str(upper), str(lower)]):
+            if lower == upper:
+                # if max == min all bins have identical value, the upper end value is extended to prevent error
+                upper += 10
+
+            # calculate bins
+            chunk = (upper - lower) / cut
+            bins = [lower + chunk * n for n in range(cut + 1)]
+            bins[0] = lower                                 # lower end must equal original min
+            bins[cut] = upper                               # upper end must equal original max
+            # print(bins)
+
+            # calculate frequency
+            binLabels = list(range(cut))
+            df1['binned'] = pd.cut(df1[colName], bins=bins, labels=binLabels, include_lowest=True)
+            freq = df1['binned'].value_counts(sort=False)
+            total = sum(freq)
+            freq_pct = {k: (v / total if total != 0 else 0) for k, v in freq.items()}
+            # print(binLabels)
+
+            # ... Y-axis label
+            for n in range(5):
+                can.create_text(40, topMargin + n * 25,
+                                text=str(columnHeight - n * 25) + '%', anchor='e', font=('Arial', 7))
+            # ... X-axis label
+            for n in range(len(bins)):
+                can.create_text(leftMargin + columnWidth * n, 120,
+                                text=func.round_by_size(bins[n], chunk, upper),
+                                width=30, anchor='n', justify='c', font=('Arial', 8))  # "width" means "wraplength"
+                                # width=40, angle=90, anchor='c', font=('Arial', 8))
+
+            # ... bars
+            for n in range(cut):
+                if freq_pct[n] > 0:
+                    can.create_rectangle(leftMargin + columnWidth * n,
+                                         topMargin + columnHeight - (freq_pct[n] * columnHeight),
+                                         (leftMargin + columnWidth) + columnWidth * n,
+                                         topMargin + columnHeight,
+                                         fill=self.fillColor[3], outline=self.lineColor, width=1)
+            # ... bottom border
+            y = topMargin + columnHeight
+            can.create_line(leftMargin, y, leftMargin + (columnWidth * 10), y, fill='#69D6FF')
+
+        else:
+            pass
+
+    def create_pie_chart(self, df1, colName, cid, colType, value_counts, nMissing, nRecord):
+        # create Canvas
+        can = tk.Canvas(self, bg='white', width=self.chtWidth, height=self.chtHeight,
+                        highlightthickness=0)
+        can.grid(row=0, column=1)
+
+        # create frame
+        frame = tk.Frame(self, bg='#DEE2E3')
+        frame.grid(row=0, column=1, padx=10, pady=(0, 15), sticky='nw')
+
+        # add missing count into value_counts
+        value_counts_f = value_counts
+        if nMissing > 0:
+            if value_counts_f.get('') is None:
+                value_counts_f[''] = nMissing          # if not exists, add new index (empty string)
+            else:
+                value_counts_f[''] += nMissing         # if already exists, increment
+
+        # extract top 6 items
+        top6 = dict(list(value_counts_f.items())[:6])
+
+        # insert table header
+        row = 0
+        tk.Label(frame, font=self.bold, bg='white', fg='#6A6A6A', text='Rank', width=5).grid(
+            row=row, column=0, padx=1, pady=1)
+        tk.Label(frame, font=self.bold, bg='white', fg='#6A6A6A', text=' Top 5 Values', anchor='w', width=25).grid(
+            row=row, column=1)
+        tk.Label(frame, font=self.bold, bg='white', fg='#6A6A6A', text='Percent', width=7).grid(
+            row=row, column=2, padx=1, pady=1)
+        row += 1
+
+        # create pie chart
+        radius = self.chtHeight - 20
+        accum = 0
+        rank = 1
+        for key, count in top6.items():
+            # change item #6 into "others" here (did not modify dict directly as "others" might be an existing key in dict)
+            if rank > 5:
+                key = 'other than top ' + str(rank - 1)
+                top5_sum = sum(list(value_counts_f.values)[:5])
+                count = nRecord - top5_sum
+
+            # insert row into table
+            tk.Label(frame, text=rank, bg='white', width=5).grid(
+                row=row, column=0, padx=1, pady=(0, 1))
+            tk.Label(frame, text=' ' + str(key)[:25], anchor='w', bg='white', width=25).grid(
+                row=row, column=1)
+            tk.Label(frame, text="{:.0%}".format(count / nRecord), bg=self.fillColor[rank - 1], width=7).grid(
+                row=row, column=2, padx=1)
+
+            # insert pie slice
+            can.create_arc((330, 10, 330 + radius, radius),
+                           fill=self.fillColor[rank - 1], outline=self.fillColor[rank - 1],
+                           start=89 + (359 * accum), extent=-359 * (count / nRecord))
+
+            accum -= (count / nRecord)
+            rank += 1
+            row += 1
+
@@ -41,8 +41,8 @@ def validate_user_option(command, options, DataSourceA, DataSourceB):
     warnings = []
 
     selDataSet = options.get('optDataSet')
-    colNameA = DataSourceA.df.iloc[0, :].tolist() if len(DataSourceA.df) > 0 else []
-    colNameB = DataSourceB.df.iloc[0, :].tolist() if len(DataSourceB.df) > 0 else []
+    colNameA = list(DataSourceA.header)
+    colNameB = list(DataSourceB.header)
 
     # validate dataset layout
     if command == 'run_connection':
@@ -123,6 +123,12 @@ def validate_user_option(command, options, DataSourceA, DataSourceB):
             # filter out 0 which represents an unselected value
             nonZero = [idx for idx in selectedIndex if (idx != 0)]
 
+            # a numeric column can be selected more than once with different aggregation functions
+            funcs = list(options.get('optAggFunc', [])) + ['sum'] * len(options.get('optAggNum', []))
+            numPairs = [(idx, f) for idx, f in zip(options.get('optAggNum', []), funcs) if (idx != 0)]
+            numIndex = [idx for idx, f in numPairs]
+            textIndex = [idx for idx in options.get('optAggText', []) if (idx != 0)]
+
             # get column name of the target dataset
             colName = [colNameA, colNameB][selDataSet]
 
@@ -132,7 +138,8 @@ def validate_user_option(command, options, DataSourceA, DataSourceB):
             if sum(selectedIndex) == 0:
                 warnings.append('To continue, please select at least 1 data field.')
 
-            if len(nonZero) != len(set(nonZero)):
+            if (len(numPairs) != len(set(numPairs))) or (len(textIndex) != len(set(textIndex))) or \
+                    (len(set(numIndex) & set(textIndex)) > 0):
                 warnings.append('Duplicated columns were selected.')
 
             if len(colName) == len(set(nonZero)):
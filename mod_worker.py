@@ -0,0 +1,93 @@
+
+# ------------------------------------------------------ #
+# Background Execution
+# ------------------------------------------------------ #
+
+import queue
+import threading
+
+
+class JobCancelled(Exception):
+    """
+    raised inside a background job when the user has requested cancellation
+    """
+    def __init__(self):
+        super(JobCancelled, self).__init__('Operation was cancelled by user.', 'i')
+
+
+class MessageQueue:
+    """
+    stand-in for Message Window inside a background job, messages are kept until the main thread hands them over
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def add(self, text, tag=''):
+        self.queue.put((text, tag))
+
+    def flush(self, log):
+        # hand over every pending message to Message Window (called by the main thread)
+        while not self.queue.empty():
+            text, tag = self.queue.get()
+            log.add(text, tag=tag)
+
+
+class Job(threading.Thread):
+    """
+    this object runs a task in a background thread and serves as a handle for the main thread
+    1. the task is called with the job itself as the first argument, so it can report progress and check cancellation
+    2. the main thread polls the handle (is_alive, stage, progress) and never blocks on the task
+    3. cancellation is cooperative, the task stops at the next checkpoint after cancel() is called
+    4. upon completion, the return value is kept in <result> and any exception raised is kept in <error>
+    5. messages for Message Window are posted to <log>, the main thread flushes them while polling
+    note: the task must not touch any visual object, as tkinter is not thread-safe
+    """
+    def __init__(self, task, *args, **kwargs):
+        super(Job, self).__init__(daemon=True)
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+        self.stage = ''                     # description of the current stage
+        self.progress = 0.0                 # fraction of work done (0.0 to 1.0)
+        self.result = None
+        self.error = None
+        self.cancelEvent = threading.Event()
+        self.log = MessageQueue()
+
+    def run(self):
+        try:
+            self.result = self.task(self, *self.args, **self.kwargs)
+            self.progress = 1.0
+        except Exception as e:
+            self.error = e
+
+    def update(self, stage, progress):
+        # every stage change is also a checkpoint for cancellation
+        self.checkpoint()
+        self.stage = stage
+        self.progress = progress
+
+    def checkpoint(self):
+        if self.cancelEvent.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        self.cancelEvent.set()
+
+
+class ForegroundJob:
+    """
+    stand-in for Job when a task runs in the calling thread (e.g. batch mode), so that the same checkpoints can be
+    placed in the task; progress is not reported anywhere and the task is never cancelled
+    """
+    def __init__(self):
+        self.stage = ''
+        self.progress = 0.0
+        self.log = None
+
+    def update(self, stage, progress):
+        self.stage = stage
+        self.progress = progress
+
+    def checkpoint(self):
+        pass
@@ -0,0 +1,115 @@
+
+# ------------------------------------------------------ #
+# Result Writer
+# ------------------------------------------------------ #
+# an operation returns data rows in their own types, anything else written out is described in df.attrs:
+#   'header' -> {column name: header text}, a column not listed is headed by its name
+#   'footer' -> rows written below data rows (e.g. control total), each row is a list of values
+#   'format' -> {column name: 'percent' or 'ratio'}, formatting deferred until the result is written out
+# the writer renders rows by chunk and joins header, chunks and footer into a single text
+
+import mod_function as func
+import mod_instrument as inst
+import mod_worker as worker
+
+import numpy as np
+import os
+import pandas as pd
+import re
+
+from pandas.io.clipboard import clipboard_set
+
+
+def render(df, sep='\t', lineEnd=os.linesep, chunkSize=100000, job=None):
+    """
+    render the result of an operation into delimited text, values are quoted the same way as the csv module does
+    (csv.QUOTE_MINIMAL), so that the text is identical to the output of DataFrame.to_csv()
+    1. rows are rendered by chunk, within a chunk every column is rendered into text in one pass (see render_column)
+       and the rows are joined at once, so that temporary text never exceeds one chunk
+    2. header, chunks and footer are joined into a single text at the end, which is the only full-size copy
+    :param job: background job rendering the text (see mod_worker), checked for cancellation per chunk
+    :return: text
+    """
+    job = worker.ForegroundJob() if job is None else job
+    fmt = df.attrs.get('format', {})
+    header = df.attrs.get('header', {})
+    n, m = df.shape
+
+    parts = [render_row([header.get(c, str(c)) for c in df.columns], sep, lineEnd)]
+    for start in range(0, n if m > 0 else 0, chunkSize):
+        job.checkpoint()
+        chunk = df.iloc[start:start + chunkSize]
+        columns = []
+        for i, c in enumerate(df.columns):
+            column = chunk.iloc[:, i]
+            text = render_column(column, fmt.get(c))
+            # text of plain numbers never contains special characters, no need to check them for quoting
+            if not (pd.api.types.is_numeric_dtype(column) and fmt.get(c) is None):
+                text = quote(text, sep, lineEnd)
+            columns.append(text.tolist())
+        if m == 1:
+            # a row of one empty value is written as "" so that the row is not taken as a blank line
+            columns[0] = ['""' if t == '' else t for t in columns[0]]
+        parts.append(lineEnd.join(map(sep.join, zip(*columns))))
+        parts.append(lineEnd)
+    parts += [render_row(row, sep, lineEnd) for row in df.attrs.get('footer', [])]
+    return ''.join(parts)
+
+
+def render_column(column, style=None):
+    """
+    render all values of a column into text
+    1. values -> same text as str() of every single value, missing value -> empty text
+       numbers are taken out as Python numbers in bulk and rendered by str(), which is much faster than rendering
+       every numpy scalar (e.g. Series.astype(str))
+    2. style 'percent' -> text with 2 decimal places (e.g. 12.35%), 'ratio' -> number as is (formatted by Excel),
+       missing value -> 'N/A'
+    :return: an object array of text
+    """
+    if style == 'percent':
+        return func.format_percent(column.to_numpy(dtype='float64', na_value=np.nan))
+    missing = column.isna().to_numpy()
+    if column.dtype.kind in 'biuf':
+        # nullable types (e.g. Int64) are taken out in their numpy type, missing values are masked below
+        values = column.to_numpy(dtype=getattr(column.dtype, 'numpy_dtype', column.dtype), na_value=0)
+        text = np.array(list(map(str, values.tolist())), dtype=object)
+    else:
+        text = column.astype(str).to_numpy(dtype=object)
+    if missing.any():
+        text = np.where(missing, 'N/A' if style == 'ratio' else '', text)
+    return text
+
+
+def render_row(values, sep, lineEnd):
+    # render a single row given as a list, e.g. header and footer
+    text = np.array(['' if pd.isna(v) else str(v) for v in values], dtype=object)
+    text = quote(text, sep, lineEnd)
+    if len(text) == 1 and text[0] == '':
+        text[0] = '""'
+    return sep.join(text) + lineEnd
+
+
+def quote(text, sep, lineEnd):
+    """
+    enclose values containing separator, quote or line break in quotes (quotes inside are doubled)
+    :return: an object array of text
+    """
+    pattern = re.compile('[' + re.escape(sep + '"' + lineEnd) + ']')
+    # search all values joined together first, values are rarely quoted
+    if pattern.search('\0'.join(text)) is None:
+        return text
+    special = np.array([pattern.search(t) is not None for t in text], dtype=bool)
+    if special.any():
+        text = text.copy()
+        text[special] = ['"' + t.replace('"', '""') + '"' for t in text[special]]
+    return text
+
+
+def to_clipboard(text):
+    """
+    hand rendered text to clipboard
+    note: clipboard is owned by the main thread, this function should not be called from a background job
+    """
+    if text is not None:
+        with inst.recorder.stage('copy to clipboard'):
+            clipboard_set(text)
@@ -12,7 +12,7 @@ operationParam = {
     'run_aggregation':
         {
             'optDataSet': 0,
-            'optAggText': [0]*5, 'optAggNum': [0]*5,
+            'optAggText': [0]*5, 'optAggNum': [0]*5, 'optAggFunc': ['sum']*5,
             'optSeparator': 1, 'optIgnoreCase': 1
         },
     'run_compare_value':
@@ -20,7 +20,7 @@ operationParam = {
             'optDeltaColumns': [0]*10,
             'optIgnoreCase': 1, 'optTrim': 1, 'optTrimZero': 0,
             'optWipeComma': 0,
-            'optPercentChg': 0, 'optChgVsTotal': 0, 'optControlTotal': 1
+            'optPercentChg': 0, 'optChgVsTotal': 0, 'optPercentAsRatio': 0, 'optControlTotal': 1
         },
     'run_join':
         {
@@ -49,7 +49,7 @@ optDesc = {
     'optIgnoreCase': 'Ignore case (case-insensitive)',
     'optJoinMode': 'SQL-mode (keep multiple match) | VLookup-mode (only fetch 1st matched record from Data B despite multiple match)',
     'optDataSet': 'Dataset A | Dataset B',
-    'optAggNum': 'Apply summation function to selected columns (up to 5 columns): ',
+    'optAggNum': 'Apply aggregation function to selected columns (up to 5 columns): ',
     'optAggText': 'Apply text aggregation to selected columns (up to 5 columns): ',
     'optSeparator': 'Select text separator',
     'optTrim': 'Remove leading and trailing whitespaces',
@@ -60,6 +60,7 @@ optDesc = {
     'optReturnUnique': 'Return unique combinations only',
     'optPercentChg': 'Calculate percent of increase / decrease',
     'optChgVsTotal': 'Calculate percent of increase / decrease relative to total change',
+    'optPercentAsRatio': 'Output percent as ratio (apply percentage format in Excel)',
     'optControlTotal': 'Include control total'
 }
 
@@ -70,7 +71,8 @@ limits = {
     'maxRow': 100000,   'maxRowInit': 100000,
     'maxCol': 50,       'maxColInit': 50,
     'maxKeyCol': 20,    'maxKeyColInit': 20,
-    'maxNumCol': 10,    'maxNumColInit': 10
+    'maxNumCol': 10,    'maxNumColInit': 10,
+    'maxJoinRow': 5000000,  'maxJoinRowInit': 5000000     # rows of join result (SQL-mode), checked before joining
 }
 
 # ------------------------------------------------------ #
@@ -112,4 +114,50 @@ restColumn = {
 
 sepList = [',', ';', '|', ' ']
 
+# aggregation functions available for numeric columns (function name in pandas: displayed name)
+aggFuncList = {'sum': 'Sum', 'count': 'Count', 'min': 'Min', 'max': 'Max', 'mean': 'Average', 'nunique': 'Distinct Count'}
+
 img_path = 'res/'
+
+
+# ------------------------------------------------------ #
+# storage of imported datasets (see DataSource.compact)
+# ------------------------------------------------------ #
+storage = {
+    'categoryRatio': 0.5,                   # text column is stored as category if distinct values <= this fraction of rows
+    'arrowString': 1                        # 1 = key and text columns are held in Arrow-backed strings (requires pyarrow),
+                                            # 0 = Python string objects
+}
+
+
+# ------------------------------------------------------ #
+# parallel matching of join keys (see mod_engine.join_positions)
+# ------------------------------------------------------ #
+parallel = {
+    'workers': 1,                           # number of worker processes, 1 = no parallelism (default, as starting
+                                            # the pool outweighs the gain on a single run), 0 = number of CPU cores
+    'minRows': 2000000                      # rows of both datasets combined, below which matching runs in one process
+}
+
+
+# ------------------------------------------------------ #
+# prefilter of join keys (see mod_engine.encode_keys_prefiltered)
+# ------------------------------------------------------ #
+prefilter = {
+    'enabled': 0,                           # 1 = rows of dataset A are checked against a Bloom filter over the keys of
+                                            # dataset B before keys are matched (join and exception), 0 = off
+    'falsePositiveRate': 0.01,              # fraction of rows without match that still pass the filter
+    'minRows': 1000000                      # rows of dataset A, below which the prefilter is skipped
+}
+
+
+# ------------------------------------------------------ #
+# stage instrumentation (timing / row count / memory of every processing stage)
+# ------------------------------------------------------ #
+instrument = {
+    'enabled': 0,                           # 1 = print breakdown in Message Window and save it to log file
+    'traceMemory': 1,                       # 1 = measure memory delta of every stage (slows down processing)
+    'logFile': 'log/stage_timing.json',     # breakdown of every run is appended as one JSON line
+    'maxBytes': 1048576,                    # log file is rotated when it reaches this size
+    'backupCount': 3                        # number of rotated log files kept
+}